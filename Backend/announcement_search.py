@@ -0,0 +1,139 @@
+import html
+import re
+from sqlalchemy import text
+from models import db
+
+# --- 1. FTS5 INDEX THAT MIRRORS Announcement.title / Announcement.text ---
+
+# An external-content FTS5 table: it stores only the search index and reads the
+# title/text back from the announcement table, so posts aren't stored twice.
+# Triggers keep it in step with every insert, edit and delete, in the same transaction.
+ANNOUNCEMENT_SEARCH_SCHEMA = [
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS announcement_fts USING fts5(
+        title, text, content='announcement', content_rowid='id', tokenize='porter unicode61'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS announcement_fts_after_insert AFTER INSERT ON announcement
+    BEGIN
+        INSERT INTO announcement_fts (rowid, title, text) VALUES (NEW.id, NEW.title, NEW.text);
+    END
+    ''',
+    # Only edits to the searchable columns touch the index (not the sync version stamp)
+    '''
+    CREATE TRIGGER IF NOT EXISTS announcement_fts_after_update AFTER UPDATE OF title, text ON announcement
+    BEGIN
+        INSERT INTO announcement_fts (announcement_fts, rowid, title, text) VALUES ('delete', OLD.id, OLD.title, OLD.text);
+        INSERT INTO announcement_fts (rowid, title, text) VALUES (NEW.id, NEW.title, NEW.text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS announcement_fts_after_delete AFTER DELETE ON announcement
+    BEGIN
+        INSERT INTO announcement_fts (announcement_fts, rowid, title, text) VALUES ('delete', OLD.id, OLD.title, OLD.text);
+    END
+    ''',
+]
+
+
+def install_announcement_search():
+    # Returns True when the index was just created and needs filling from existing posts
+    exists = db.session.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'announcement_fts'"
+    )).first()
+    for statement in ANNOUNCEMENT_SEARCH_SCHEMA:
+        db.session.execute(text(statement))
+    db.session.commit()
+    return exists is None
+
+
+def rebuild_announcement_search():
+    # Re-read every post into the index (for recovery or after bulk loads with triggers off)
+    db.session.execute(text("INSERT INTO announcement_fts (announcement_fts) VALUES ('rebuild')"))
+    db.session.commit()
+    return db.session.execute(text('SELECT COUNT(*) FROM announcement')).scalar()
+
+
+# --- 2. SEARCHING ---
+
+# Weights for bm25(): a hit in the title counts more than one in the body
+TITLE_WEIGHT = 5.0
+TEXT_WEIGHT = 1.0
+
+# Words in the snippet around the best match
+SNIPPET_WORDS = 16
+
+# bm25 has to score every match before it can sort, which for a word found in most posts
+# means reading most of the index. So only the newest RANK_WINDOW matches are ranked: a query
+# with fewer matches is ranked exactly. Past them the older matches follow, newest first,
+# so paging still reaches every match.
+RANK_WINDOW = 5000
+
+# SQLite marks the matches with these control characters; after HTML-escaping the
+# post text they become <mark> tags, so snippets are safe to put into a page
+MATCH_START, MATCH_END = '\x02', '\x03'
+
+# 1. The ranked part: the newest RANK_WINDOW matches by bm25. 2. Only when the window is
+# full: the older matches, newest first. Each part reads only as far as the page needs
+# (:stop = offset + limit), and the highlight and snippet are made for the page's rows alone.
+SEARCH_SQL = text(f'''
+    WITH window_start AS MATERIALIZED (
+        SELECT MIN(rowid) AS rowid, COUNT(*) AS ranked FROM (
+            SELECT rowid FROM announcement_fts WHERE announcement_fts MATCH :query
+            ORDER BY rowid DESC LIMIT {RANK_WINDOW}
+        )
+    ),
+    page AS MATERIALIZED (
+        SELECT * FROM (
+            SELECT 0 AS part, bm25(announcement_fts, {TITLE_WEIGHT}, {TEXT_WEIGHT}) AS position, rowid AS id
+            FROM announcement_fts
+            WHERE announcement_fts MATCH :query AND rowid >= (SELECT rowid FROM window_start)
+            ORDER BY position, id
+            LIMIT :stop
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT 1, -rowid, rowid
+            FROM announcement_fts
+            WHERE (SELECT ranked FROM window_start) = {RANK_WINDOW}
+              AND announcement_fts MATCH :query AND rowid < (SELECT rowid FROM window_start)
+            ORDER BY rowid DESC
+            LIMIT :stop
+        )
+        ORDER BY 1, 2, 3
+        LIMIT :limit OFFSET :offset
+    )
+    SELECT announcement.id, announcement.title, announcement.text, announcement.date,
+           highlight(announcement_fts, 0, :start, :end),
+           snippet(announcement_fts, 1, :start, :end, '...', {SNIPPET_WORDS})
+    FROM page
+    JOIN announcement_fts ON announcement_fts.rowid = page.id
+    JOIN announcement ON announcement.id = page.id
+    WHERE announcement_fts MATCH :query
+    ORDER BY page.part, page.position, page.id
+''')
+
+
+def build_match_query(q):
+    # Turn free text into a safe FTS5 query: every word must appear (quoted, so
+    # characters like " * : - are never read as query syntax), and the last word
+    # also matches as a prefix, so "mid" finds "midterm" while the user is typing.
+    words = re.findall(r'\w+', q or '')
+    if not words:
+        return None
+    terms = ['"' + word + '"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def mark_matches(value):
+    return html.escape(value or '').replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+
+def search_announcements(match_query, limit, offset):
+    # One statement: the page plus the highlighted title and body snippet
+    return db.session.execute(SEARCH_SQL, {
+        'query': match_query, 'limit': limit, 'offset': offset, 'stop': limit + offset,
+        'start': MATCH_START, 'end': MATCH_END
+    }).all()
@@ -1,19 +1,82 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, make_response
 from models import db, Announcement # Import necessary items
+from query_budget import query_budget # Most SQL statements each route may run
+from tokens import token_required # Checks the signed login token
+from cache import cached_get # Cached JSON for the GET routes
+from serializers import select_rows, rows_to_dicts, json_response # Fast list serialization
+from announcement_search import build_match_query, search_announcements, mark_matches # FTS5 search
+import hashlib # Used to build the ETag of a page
 
 # Create a Blueprint to manage the announcement routes
 announcement_api = Blueprint('announcement_api', __name__)
 
+# The biggest page a client can ask for with ?limit=
+MAX_PAGE_SIZE = 200
+
+# Search results per page when ?limit= is not given
+DEFAULT_SEARCH_PAGE_SIZE = 20
+
+
+# --- Helper for conditional GET ---
+
+def make_etag(rows, has_more):
+    # Hash the raw column values of the page, so any new, edited or deleted post changes it
+    digest = hashlib.sha1(b'more' if has_more else b'last')
+    for row in rows:
+        digest.update(repr(tuple(row)).encode('utf-8'))
+    return digest.hexdigest()
+
 # --- API ROUTES for ANNOUNCEMENTS ---
 
 # Route to get all announcements OR post a new one
 @announcement_api.route('/', methods=['GET', 'POST'])
+@token_required
+@query_budget(GET=2, POST=2)
+@cached_get('announcement')
 def handle_all_announcements():
     if request.method == 'GET':
-        # Get all announcements from the database
-        all_posts = Announcement.query.all()
-        # Convert the posts to the web-friendly format
-        return jsonify([post.to_dict() for post in all_posts])
+        # Build the query from the optional filters (?title=...&posted_on=...)
+        query = select_rows(Announcement)
+        title = request.args.get('title')
+        if title:
+            query = query.filter(Announcement.title.contains(title))
+        posted_on = request.args.get('posted_on')
+        if posted_on:
+            query = query.filter(Announcement.date == posted_on)
+
+        # Keyset pagination: only return posts with an id bigger than ?after=
+        after = request.args.get('after', type=int)
+        if after is not None:
+            query = query.filter(Announcement.id > after)
+        query = query.order_by(Announcement.id)
+
+        # ?limit= caps the page size (no limit means the whole feed, like before)
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, MAX_PAGE_SIZE))
+            # Ask for one extra row so we know if there is another page
+            all_posts = query.limit(limit + 1).all()
+            has_more = len(all_posts) > limit
+            all_posts = all_posts[:limit]
+        else:
+            all_posts = query.all()
+            has_more = False
+
+        # If the client already has exactly these rows, skip the serializer (304)
+        etag = make_etag(all_posts, has_more)
+        # (weak comparison: compressed responses carry the tag as W/"...", see compression.py)
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+
+        # Convert the rows straight to JSON (no ORM objects or to_dict calls)
+        response = json_response(rows_to_dicts(Announcement, all_posts))
+        response.set_etag(etag)
+        if has_more:
+            # Tell the client where the next page starts
+            response.headers['X-Next-Cursor'] = str(all_posts[-1][0])
+        return response
 
     elif request.method == 'POST':
         # Get the new data from the user
@@ -28,13 +91,54 @@ def handle_all_announcements():
         # Save and apply changes to the database
         db.session.add(new_post)
         db.session.commit()
+        post_data = new_post.to_dict()
         
         # Return the new post's data (201 means 'Created')
-        return jsonify(new_post.to_dict()), 201
+        return jsonify(post_data), 201
+
+
+# Route to search old announcements (?q=midterm room)
+# Best matches first (title hits count more), with the matches wrapped in <mark> tags.
+# Page with ?limit= and ?offset=; X-Next-Cursor holds the offset of the next page.
+@announcement_api.route('/search', methods=['GET'])
+@token_required
+@query_budget(GET=2)
+@cached_get('announcement')
+def search_all_announcements():
+    match_query = build_match_query(request.args.get('q'))
+    if match_query is None:
+        return jsonify({'message': 'Give some words to search for with ?q='}), 400
+
+    limit = request.args.get('limit', DEFAULT_SEARCH_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    offset = max(0, request.args.get('offset', 0, type=int))
+
+    # Ask for one extra row so we know if there is another page
+    rows = search_announcements(match_query, limit + 1, offset)
+    has_more = len(rows) > limit
+
+    results = []
+    for post_id, title, text, posted_on, title_highlight, snippet in rows[:limit]:
+        results.append({
+            'id': post_id,
+            'title': title,
+            'content': text,
+            'posted_on': posted_on,
+            'title_highlight': mark_matches(title_highlight),
+            'snippet': mark_matches(snippet)
+        })
+
+    response = json_response(results)
+    if has_more:
+        response.headers['X-Next-Cursor'] = str(offset + limit)
+    return response
 
 
 # Route to handle one specific announcement (by its ID)
 @announcement_api.route('/<int:id>', methods=['GET', 'PUT', 'DELETE'])
+@token_required
+@query_budget(GET=2, PUT=3, DELETE=2)
+@cached_get('announcement')
 def handle_single_announcement(id):
     # Find the announcement by ID or return a Not Found error
     post = Announcement.query.get_or_404(id)
@@ -49,7 +153,8 @@ def handle_single_announcement(id):
         post.text = data.get('content', post.text)
         
         db.session.commit()
-        return jsonify(post.to_dict())
+        post_data = post.to_dict()
+        return jsonify(post_data)
 
     elif request.method == 'DELETE':
         # Remove the post from the database
@@ -1,18 +1,64 @@
 from flask import Blueprint, jsonify, request
 from models import db, Assignment
+from query_budget import query_budget # Most SQL statements each route may run
+from tokens import token_required # Checks the signed login token
+from serializers import select_rows, rows_to_dicts, json_response # Fast list serialization
 from datetime import datetime # Needed to parse the date input
 
 # Create a Blueprint for assignments
 assignments_api = Blueprint('assignments_api', __name__)
 
+# Columns a client can sort the assignment list by
+SORT_COLUMNS = {
+    'due_date': Assignment.due_date,
+    'title': Assignment.title,
+    'id': Assignment.id,
+}
+
 # --- 1. GET ALL, POST NEW ASSIGNMENT ---
 @assignments_api.route('/<int:user_id>', methods=['GET', 'POST'])
+@token_required
+@query_budget(GET=1, POST=2)
 def manage_assignments(user_id):
     # Filter by user ID as this is personalized data
     if request.method == 'GET':
-        # GET: Fetch all assignments for a specific user
-        all_tasks = Assignment.query.filter_by(user_id=user_id).all()
-        return jsonify([task.to_dict() for task in all_tasks])
+        # GET: Fetch the assignments for a specific user, filtered and sorted in the database
+        # Work out "now" once so every row is compared against the same moment
+        now = datetime.utcnow()
+        query = Assignment.query.filter_by(user_id=user_id)
+
+        # ?status=pending|done|overdue (pending = not done and not yet due)
+        status = request.args.get('status')
+        if status == 'done':
+            query = query.filter(Assignment.is_completed == True)
+        elif status == 'pending':
+            query = query.filter(Assignment.is_completed.isnot(True), Assignment.due_date >= now)
+        elif status == 'overdue':
+            query = query.filter(Assignment.is_completed.isnot(True), Assignment.due_date < now)
+        elif status:
+            return jsonify({'message': 'Invalid status. Use pending, done or overdue.'}), 400
+
+        # ?due_before= / ?due_after= use the (user_id, due_date) index
+        try:
+            if request.args.get('due_before'):
+                query = query.filter(Assignment.due_date < datetime.fromisoformat(request.args['due_before']))
+            if request.args.get('due_after'):
+                query = query.filter(Assignment.due_date >= datetime.fromisoformat(request.args['due_after']))
+        except ValueError:
+            return jsonify({'message': 'Invalid due_before/due_after format. Use YYYY-MM-DDTHH:MM:SS format.'}), 400
+
+        if request.args.get('course_code'):
+            query = query.filter(Assignment.course_code == request.args['course_code'])
+
+        # ?sort=due_date (default), -due_date, title, -title or id
+        sort = request.args.get('sort', 'due_date')
+        column = SORT_COLUMNS.get(sort.lstrip('-'))
+        if column is None:
+            return jsonify({'message': 'Invalid sort. Use due_date, title or id (prefix with - for descending).'}), 400
+        query = query.order_by(column.desc() if sort.startswith('-') else column, Assignment.id)
+
+        all_tasks = select_rows(Assignment, query).all()
+        return json_response(rows_to_dicts(Assignment, all_tasks, now))
 
     elif request.method == 'POST':
         # POST: Create a new assignment
@@ -38,6 +84,8 @@ def manage_assignments(user_id):
 
 # --- 2. UPDATE/DELETE & MARK STATUS ---
 @assignments_api.route('/<int:user_id>/<int:task_id>', methods=['PUT', 'DELETE'])
+@token_required
+@query_budget(PUT=3, DELETE=2)
 def manage_single_assignment(user_id, task_id):
     # Fetch the task, ensuring it belongs to the correct user
     task = Assignment.query.filter_by(id=task_id, user_id=user_id).first_or_404()
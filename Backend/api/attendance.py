@@ -1,13 +1,47 @@
 from flask import Blueprint, jsonify, request
-from models import db, Attendance, Course # We need Course to calculate attendance later
-from sqlalchemy import func # For database functions like counting
+from models import db, Attendance, AttendanceStats, ArchivedTerm, Course # We need Course to calculate attendance later
+from query_budget import query_budget # Most SQL statements each route may run
+from tokens import token_required, can_act_for, forbidden # Checks the signed login token
+from archive import attendance_history, archived_summary, term_containing, MAX_ATTACHED_TERMS # Closed terms
+from serializers import rows_to_dicts # Column tuples to JSON-ready dicts
+from sqlalchemy.dialects.sqlite import insert # INSERT ... ON CONFLICT DO UPDATE
+from datetime import datetime, date # Needed for the session date
+from collections import defaultdict
 import json # Used to handle data correctly
 
 # Create a Blueprint for attendance
 attendance_api = Blueprint('attendance_api', __name__)
 
+
+# --- Helpers for marking ---
+
+def parse_session_date(value):
+    # The class day the mark is for (YYYY-MM-DD); today if not given. Raises ValueError.
+    if value is None:
+        return datetime.utcnow().date()
+    return date.fromisoformat(value)
+
+def closed_term_response(session_date):
+    # 409 means 'Conflict': the day belongs to a term that was archived (None if it doesn't)
+    term = term_containing(session_date)
+    if term is None:
+        return None
+    return jsonify({'message': f"{session_date.isoformat()} is in the archived term '{term.name}', "
+                               "whose marks can no longer change"}), 409
+
+def upsert_marks():
+    # One row per student/course/day: marking again (e.g. a retried request) just updates
+    # the status. The attendance_stats triggers keep the totals exact either way.
+    stmt = insert(Attendance)
+    return stmt.on_conflict_do_update(
+        index_elements=[Attendance.user_id, Attendance.course_code, Attendance.session_date],
+        set_={'is_present': stmt.excluded.is_present, 'timestamp': stmt.excluded.timestamp}
+    )
+
 # --- 1. MARK ATTENDANCE (POST) ---
 @attendance_api.route('/mark', methods=['POST'])
+@token_required
+@query_budget(POST=2)
 def mark_attendance():
     data = request.get_json()
     
@@ -18,42 +52,145 @@ def mark_attendance():
 
     if not user_id or not course_code:
         return jsonify({'message': 'Missing user_id or course_code'}), 400
+    if not can_act_for(user_id):
+        return forbidden()
 
-    # Create a new attendance record
-    new_record = Attendance(
-        user_id=user_id,
-        course_code=course_code,
-        is_present=is_present
-    )
-    
-    db.session.add(new_record)
+    try:
+        session_date = parse_session_date(data.get('session_date'))
+    except (TypeError, ValueError):
+        return jsonify({'message': 'Invalid session_date format. Use YYYY-MM-DD format.'}), 400
+    closed = closed_term_response(session_date)
+    if closed:
+        return closed
+
+    # Insert the attendance record, or update it if this day was already marked (one statement)
+    record = db.session.execute(
+        upsert_marks().values(
+            user_id=user_id,
+            course_code=course_code,
+            is_present=is_present,
+            session_date=session_date,
+            timestamp=datetime.utcnow()
+        ).returning(Attendance)
+    ).scalar_one()
+    # Read the row before the commit expires it (saves a SELECT)
+    result = record.to_dict()
+    db.session.commit()
+
+    return jsonify(result), 201
+
+# --- 2. MARK A WHOLE ROLL CALL AT ONCE (POST) ---
+@attendance_api.route('/mark/bulk', methods=['POST'])
+@token_required
+@query_budget(POST=2)
+def mark_attendance_bulk():
+    data = request.get_json() or {}
+
+    # One course code for the whole class, plus a list of {user_id, is_present}
+    course_code = data.get('course_code')
+    entries = data.get('entries')
+
+    if not course_code or not isinstance(entries, list):
+        return jsonify({'message': 'Missing course_code or entries list'}), 400
+
+    try:
+        session_date = parse_session_date(data.get('session_date'))
+    except (TypeError, ValueError):
+        return jsonify({'message': 'Invalid session_date format. Use YYYY-MM-DD format.'}), 400
+    closed = closed_term_response(session_date)
+    if closed:
+        return closed
+    now = datetime.utcnow()
+
+    # Check every entry in one pass and remember what happened to each row
+    rows = []
+    results = []
+    for index, entry in enumerate(entries):
+        user_id = entry.get('user_id') if isinstance(entry, dict) else None
+        if not isinstance(user_id, int) or isinstance(user_id, bool) or user_id <= 0:
+            results.append({'index': index, 'status': 'error', 'message': 'Missing or invalid user_id'})
+            continue
+
+        if not can_act_for(user_id):
+            results.append({'index': index, 'user_id': user_id, 'status': 'error', 'message': 'You can only mark your own attendance'})
+            continue
+
+        is_present = entry.get('is_present', True) # Default to Present if not specified
+        if not isinstance(is_present, bool):
+            results.append({'index': index, 'user_id': user_id, 'status': 'error', 'message': 'is_present must be true or false'})
+            continue
+
+        rows.append({'user_id': user_id, 'course_code': course_code, 'is_present': is_present,
+                     'session_date': session_date, 'timestamp': now})
+        results.append({'index': index, 'user_id': user_id})
+
+    if not rows:
+        return jsonify({'message': 'No valid entries', 'results': results}), 400
+
+    # Upsert every valid row in one statement and one commit. RETURNING gives the version
+    # as the upsert left it, before the change-log trigger stamps it: 0 for a new row, the
+    # existing stamp for a row that was already there (also a repeat within this batch).
+    # (SQLAlchemy sends up to 1000 rows per statement, well above a 300-seat lecture.)
+    returned = db.session.execute(
+        upsert_marks().returning(Attendance.user_id, Attendance.version), rows
+    ).all()
     db.session.commit()
 
-    return jsonify(new_record.to_dict()), 201
+    # A student listed twice: the first entry is the one that may have created the row
+    versions = defaultdict(list)
+    for user_id, version in sorted(returned):
+        versions[user_id].append(version)
+    for result in results:
+        if 'status' not in result:
+            result['status'] = 'created' if versions[result['user_id']].pop(0) == 0 else 'updated'
+    created = sum(1 for result in results if result['status'] == 'created')
+
+    return jsonify({
+        'course_code': course_code,
+        'created': created,
+        'updated': len(rows) - created,
+        'failed': len(results) - len(rows),
+        'results': results
+    }), 201
 
-# --- 2. GET ATTENDANCE SUMMARY (GET) ---
+# --- 3. GET ATTENDANCE SUMMARY (GET) ---
+# The current term by default; ?term=<name> for an archived term, ?term=all for every term
 @attendance_api.route('/summary/<int:user_id>', methods=['GET'])
+@token_required
+@query_budget(GET=2)
 def get_attendance_summary(user_id):
-    # Find all unique courses this user has attendance records for
-    course_codes = db.session.query(Attendance.course_code).filter_by(user_id=user_id).distinct().all()
-    
-    summary = []
-    
-    for (code,) in course_codes:
-        # Total number of classes attended (is_present = True)
-        present_count = db.session.query(func.count(Attendance.id)).filter_by(user_id=user_id, course_code=code, is_present=True).scalar()
-        
-        # Total number of classes marked (Present + Absent)
-        total_count = db.session.query(func.count(Attendance.id)).filter_by(user_id=user_id, course_code=code).scalar()
-        
-        # Calculate percentage (handle division by zero if no records)
-        percentage = round((present_count / total_count) * 100, 2) if total_count > 0 else 0
-
-        summary.append({
-            'course_code': code,
-            'present': present_count,
-            'total_classes': total_count,
-            'percentage': percentage
-        })
-
-    return jsonify(summary)
\ No newline at end of file
+    term = request.args.get('term')
+    if term is None:
+        # The totals are kept up to date by every mark, so this is a primary-key lookup per course
+        all_stats = AttendanceStats.query.filter_by(user_id=user_id) \
+            .order_by(AttendanceStats.course_code) \
+            .all()
+    else:
+        # Archived terms have their totals precomputed, so no archive file is opened
+        if term != 'all' and db.session.get(ArchivedTerm, term) is None:
+            return jsonify({'message': f"No archived term named '{term}'"}), 404
+        all_stats = archived_summary(user_id, term)
+
+    summary = [stats.to_dict() for stats in all_stats]
+
+    return jsonify(summary)
+
+# --- 4. GET A STUDENT'S MARKS, INCLUDING ARCHIVED TERMS (GET) ---
+# ?since=YYYY-MM-DD&until=YYYY-MM-DD (both included) and ?course_code= narrow it down.
+# Archived terms inside the range are attached just for this query.
+@attendance_api.route('/history/<int:user_id>', methods=['GET'])
+@token_required
+@query_budget(GET=2 + 2 * MAX_ATTACHED_TERMS)
+def get_attendance_history(user_id):
+    try:
+        since = parse_session_date(request.args['since']) if 'since' in request.args else None
+        until = parse_session_date(request.args['until']) if 'until' in request.args else None
+    except ValueError:
+        return jsonify({'message': 'Invalid since/until format. Use YYYY-MM-DD format.'}), 400
+
+    try:
+        rows = attendance_history(user_id, since, until, request.args.get('course_code'))
+    except ValueError as error:
+        return jsonify({'message': str(error)}), 400
+
+    return jsonify(rows_to_dicts(Attendance, rows))
@@ -1,7 +1,9 @@
-from flask import Blueprint, jsonify, request
-# We need to import the password hashing tool
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, jsonify, request, g
+# We need to import the password hashing tool (runs in a separate process pool)
+from hashing import hash_password, verify_password, needs_rehash, HashingBusy
 from models import db, User # Import necessary items
+from query_budget import query_budget # Most SQL statements each route may run
+from tokens import issue_token, revoke_token, token_required # Signed login tokens
 
 # Create a Blueprint for authentication
 auth_api = Blueprint('auth_api', __name__)
@@ -10,15 +12,16 @@ auth_api = Blueprint('auth_api', __name__)
 
 def set_password(user, password):
     # Hashes the password securely before storing it
-    user.password_hash = generate_password_hash(password)
+    user.password_hash = hash_password(password)
 
 def check_password(user, password):
     # Compares a login attempt to the stored hash
-    return check_password_hash(user.password_hash, password)
+    return verify_password(user.password_hash, password)
 
 
 # --- 1. REGISTRATION Route (Sign-Up) ---
 @auth_api.route('/register', methods=['POST'])
+@query_budget(POST=3)
 def register():
     data = request.get_json()
     username = data.get('username')
@@ -35,7 +38,10 @@ def register():
     new_user = User(username=username)
     
     # Hash and set the password using the secure helper function
-    set_password(new_user, password) 
+    try:
+        set_password(new_user, password)
+    except HashingBusy:
+        return jsonify({'message': 'Server is busy, please try again'}), 503
     
     db.session.add(new_user)
     db.session.commit()
@@ -45,6 +51,7 @@ def register():
 
 # --- 2. LOGIN Route ---
 @auth_api.route('/login', methods=['POST'])
+@query_budget(POST=2)
 def login():
     data = request.get_json()
     username = data.get('username')
@@ -54,12 +61,44 @@ def login():
     user = User.query.filter_by(username=username).first()
 
     # Check if user exists AND if the password is correct
-    if user and check_password(user, password):
+    try:
+        is_valid = bool(user and password) and check_password(user, password)
+    except HashingBusy:
+        return jsonify({'message': 'Server is busy, please try again'}), 503
+
+    if is_valid:
+        # Read the user before a commit expires it (saves reloading the row)
+        user_data = user.to_dict()
+        token = issue_token(user)
+
+        # Upgrade the stored hash if the algorithm or cost has changed since it was made
+        if needs_rehash(user.password_hash):
+            try:
+                set_password(user, password)
+                db.session.commit()
+            except HashingBusy:
+                pass # Not critical, try again on the next login
+
         # Successful login!
         return jsonify({
             'message': 'Login successful', 
-            'user': user.to_dict()
+            'user': user_data,
+            'token': token
         }), 200
     else:
         # Failed login attempt
-        return jsonify({'message': 'Invalid credentials'}), 401
\ No newline at end of file
+        return jsonify({'message': 'Invalid credentials'}), 401
+
+
+# --- 3. LOGOUT Route ---
+@auth_api.route('/logout', methods=['POST'])
+@token_required
+@query_budget(POST=2)
+def logout():
+    if g.current_user is None:
+        return jsonify({'message': 'Missing token'}), 401
+
+    # The token stops working straight away here, and in the other server processes
+    # within TOKEN_REVOCATION_REFRESH_SECONDS
+    revoke_token(g.current_user)
+    return jsonify({'message': 'Logged out'}), 200
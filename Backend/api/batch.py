@@ -0,0 +1,78 @@
+from flask import Blueprint, jsonify, request, current_app
+from models import db # Import necessary items
+from query_budget import query_budget # Most SQL statements each route may run
+
+# Create a Blueprint for batched requests
+batch_api = Blueprint('batch_api', __name__)
+
+# Most sub-requests one batch can carry
+MAX_BATCH_SIZE = 20
+
+# Methods that only read, so they can safely share the same database session
+READ_METHODS = ('GET', 'HEAD')
+
+
+# --- Helper to run one sub-request ---
+
+def dispatch(sub_request, headers):
+    method = str(sub_request.get('method', 'GET')).upper()
+    path = sub_request.get('path')
+
+    if not isinstance(path, str) or not path.startswith('/api/'):
+        return {'status': 400, 'body': {'message': 'Each sub-request needs a path starting with /api/'}}
+    if path.split('?', 1)[0].rstrip('/') == '/api/batch':
+        return {'status': 400, 'body': {'message': 'Batches cannot be nested'}}
+    if path.split('?', 1)[0].rstrip('/') == '/api/stream':
+        return {'status': 400, 'body': {'message': 'The change stream cannot run inside a batch'}}
+
+    # Build a request context for the sub-request and run it through the normal Flask
+    # dispatch (before/after request hooks, blueprints, error handlers) without any HTTP.
+    # It reuses the current app context, so every sub-request shares one db.session.
+    with current_app.test_request_context(path, method=method, json=sub_request.get('body'), headers=headers):
+        try:
+            response = current_app.full_dispatch_request()
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception('Batch sub-request %s %s failed', method, path)
+            return {'status': 500, 'body': {'message': 'Internal server error'}}
+
+        if method not in READ_METHODS:
+            # Don't let a failed write leave the shared session half-done for the next one
+            if response.status_code >= 400:
+                db.session.rollback()
+
+        body = response.get_json(silent=True)
+        if body is None:
+            body = response.get_data(as_text=True)
+
+        result = {'status': response.status_code, 'body': body}
+        if 'ETag' in response.headers:
+            result['etag'] = response.headers['ETag']
+        return result
+
+
+# --- 1. RUN MANY REQUESTS IN ONE ROUND-TRIP ---
+@batch_api.route('', methods=['POST'])
+@query_budget(POST=0)
+def run_batch():
+    data = request.get_json(silent=True) or {}
+    sub_requests = data.get('requests')
+
+    if not isinstance(sub_requests, list) or not sub_requests:
+        return jsonify({'message': 'Send a non-empty "requests" list of {method, path, body}'}), 400
+    if len(sub_requests) > MAX_BATCH_SIZE:
+        return jsonify({'message': f'A batch can hold at most {MAX_BATCH_SIZE} requests'}), 400
+
+    # Sub-requests act as the same caller as the batch itself
+    headers = {}
+    if 'Authorization' in request.headers:
+        headers['Authorization'] = request.headers['Authorization']
+
+    responses = []
+    for sub_request in sub_requests:
+        if not isinstance(sub_request, dict):
+            responses.append({'status': 400, 'body': {'message': 'Each sub-request must be an object'}})
+            continue
+        responses.append(dispatch(sub_request, headers))
+
+    return jsonify({'responses': responses})
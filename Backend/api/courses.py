@@ -1,20 +1,39 @@
 from flask import Blueprint, jsonify, request
 from models import db, Course # Import necessary items
+from query_budget import query_budget # Most SQL statements each route may run
+from tokens import token_required # Checks the signed login token
+from cache import cached_get # Cached JSON for the GET routes
+from serializers import select_rows, rows_to_dicts, json_response # Fast list serialization
+from timetable import timetable_index, parse_time_slot, find_conflicts, TimeSlotError # Room/professor clashes
 
 # Create a Blueprint to manage the course routes
 course_api = Blueprint('course_api', __name__)
 
+
+# --- Helper for timetable clashes ---
+
+def clash_response(clashes):
+    # 409 means 'Conflict': the room or professor is already booked at that time
+    return jsonify({'message': 'This course clashes with the timetable', 'conflicts': clashes}), 409
+
 # --- API ROUTES for COURSES ---
 
 # Route to get all courses OR post a new one
 @course_api.route('/', methods=['GET', 'POST'])
+@token_required
+@query_budget(GET=2, POST=3)
+@cached_get('course')
 def handle_all_courses():
     if request.method == 'GET':
-        all_courses = Course.query.all()
-        return jsonify([c.to_dict() for c in all_courses])
+        all_courses = select_rows(Course).order_by(Course.id).all()
+        return json_response(rows_to_dicts(Course, all_courses))
 
     elif request.method == 'POST':
         data = request.get_json()
+        try:
+            meetings = parse_time_slot(data.get('time'))
+        except TimeSlotError as error:
+            return jsonify({'message': f'Invalid time: {error}'}), 400
         
         new_course = Course(
             code=data['code'],
@@ -25,12 +44,28 @@ def handle_all_courses():
         )
         
         db.session.add(new_course)
+        # Writing the row first takes the database's write lock, so no other worker can
+        # commit a clashing course between this check and our commit
+        db.session.flush()
+        if meetings:
+            clashes = timetable_index.check(new_course.id, new_course.room, new_course.prof, meetings)
+            if clashes:
+                db.session.rollback()
+                return clash_response(clashes)
+
+        # Read the row before the commit expires it (saves a SELECT)
+        course_data = new_course.to_dict()
+        booking = (new_course.id, new_course.code, new_course.room, new_course.prof, new_course.time)
         db.session.commit()
-        return jsonify(new_course.to_dict()), 201
+        timetable_index.put(*booking)
+        return jsonify(course_data), 201
 
 
 # Route to handle one specific course (by its ID)
 @course_api.route('/<int:id>', methods=['GET', 'PUT', 'DELETE'])
+@token_required
+@query_budget(GET=2, PUT=4, DELETE=2)
+@cached_get('course')
 def handle_single_course(id):
     course = Course.query.get_or_404(id)
 
@@ -43,11 +78,42 @@ def handle_single_course(id):
         course.name = data.get('name', course.name)
         course.prof = data.get('professor', course.prof)
         course.room = data.get('room', course.room)
-        
+        course.time = data.get('time', course.time)
+
+        # Only a new room, professor or time can cause a clash
+        if {'professor', 'room', 'time'} & set(data):
+            try:
+                meetings = parse_time_slot(course.time)
+            except TimeSlotError as error:
+                db.session.rollback()
+                return jsonify({'message': f'Invalid time: {error}'}), 400
+            # Takes the write lock first, as in POST
+            db.session.flush()
+            clashes = timetable_index.check(course.id, course.room, course.prof, meetings) if meetings else []
+            if clashes:
+                db.session.rollback()
+                return clash_response(clashes)
+
+        # Read the row before the commit expires it (saves a SELECT)
+        course_data = course.to_dict()
+        booking = (course.id, course.code, course.room, course.prof, course.time)
         db.session.commit()
-        return jsonify(course.to_dict())
+        timetable_index.put(*booking)
+        return jsonify(course_data)
 
     elif request.method == 'DELETE':
         db.session.delete(course)
         db.session.commit()
-        return '', 204
\ No newline at end of file
+        timetable_index.remove(id)
+        return '', 204
+
+
+# Route to check the whole catalog for clashes (for the scheduling office)
+# Reads every course once and sweeps each room's and professor's week in time order.
+@course_api.route('/conflicts', methods=['GET'])
+@token_required
+@query_budget(GET=2)
+@cached_get('course')
+def check_all_courses():
+    courses = db.session.query(Course.id, Course.code, Course.room, Course.prof, Course.time).all()
+    return json_response(find_conflicts(courses))
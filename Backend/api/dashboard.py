@@ -0,0 +1,72 @@
+from flask import Blueprint, jsonify, request
+from models import db, Announcement, Assignment, AttendanceStats, Course # Import necessary items
+from query_budget import query_budget # Most SQL statements each route may run
+from tokens import token_required # Checks the signed login token
+from cache import cached_get # Cached JSON per user
+from sqlalchemy import func, case, select, union
+from datetime import datetime
+
+# Create a Blueprint for the student dashboard
+dashboard_api = Blueprint('dashboard_api', __name__)
+
+# How many of the latest announcements the dashboard shows (?announcements=N)
+DEFAULT_ANNOUNCEMENTS = 5
+MAX_ANNOUNCEMENTS = 50
+
+
+# --- 1. EVERYTHING A STUDENT SEES ON LOGIN ---
+# Always 4 SQL statements, however many courses the student has:
+# attendance totals, assignment counts, the student's courses and the latest announcements
+# (plus the cache's change-number lookup).
+# Cached until the courses, announcements or this student's assignments/attendance change,
+# or until the next pending deadline passes (it then moves from pending to overdue).
+@dashboard_api.route('/<int:user_id>', methods=['GET'])
+@token_required
+@query_budget(GET=5)
+@cached_get('course', 'announcement', 'assignment:{user_id}', 'attendance:{user_id}')
+def get_dashboard(user_id):
+    limit = request.args.get('announcements', DEFAULT_ANNOUNCEMENTS, type=int)
+    limit = max(0, min(limit, MAX_ANNOUNCEMENTS))
+    # One "now" for the whole request
+    now = datetime.utcnow()
+
+    # 1. Attendance summary (same entries as /api/attendance/summary)
+    attendance = AttendanceStats.query.filter_by(user_id=user_id) \
+        .order_by(AttendanceStats.course_code) \
+        .all()
+
+    # 2. Pending / overdue / done counts in one pass over the (user_id, due_date) index,
+    # plus the next pending deadline, when these counts stop being true
+    not_done = Assignment.is_completed.isnot(True)
+    pending, overdue, done, next_due = db.session.query(
+        func.sum(case(((not_done) & (Assignment.due_date >= now), 1), else_=0)),
+        func.sum(case(((not_done) & (Assignment.due_date < now), 1), else_=0)),
+        func.sum(case((Assignment.is_completed == True, 1), else_=0)),
+        func.min(case(((not_done) & (Assignment.due_date >= now), Assignment.due_date)))
+    ).filter(Assignment.user_id == user_id).one()
+
+    # 3. The student's courses: any course they have attendance or assignments for
+    course_codes = union(
+        select(AttendanceStats.course_code).where(AttendanceStats.user_id == user_id),
+        select(Assignment.course_code).where(Assignment.user_id == user_id)
+    )
+    courses = Course.query.filter(Course.code.in_(select(course_codes.subquery().c[0]))) \
+        .order_by(Course.code) \
+        .all()
+
+    # 4. Latest announcements, newest first
+    announcements = Announcement.query.order_by(Announcement.id.desc()).limit(limit).all() if limit else []
+
+    response = jsonify({
+        'user_id': user_id,
+        'courses': [course.to_dict() for course in courses],
+        'assignments': {
+            'pending': pending or 0,
+            'overdue': overdue or 0,
+            'done': done or 0
+        },
+        'attendance': [stats.to_dict() for stats in attendance],
+        'announcements': [post.to_dict() for post in announcements]
+    })
+    response.cache_expires_at = next_due
+    return response
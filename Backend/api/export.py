@@ -0,0 +1,115 @@
+from flask import Blueprint, jsonify, request, Response, stream_with_context, g
+from models import Attendance, Assignment # Import necessary items
+from query_budget import query_budget # Most SQL statements each route may run
+from tokens import token_required, can_act_for, forbidden, ADMIN_ROLE # Checks the signed login token
+from serializers import select_rows, row_to_dict, dumps # Column tuples instead of ORM objects
+from datetime import datetime # Needed to parse the date filters
+import csv
+import io
+
+# Create a Blueprint for the bulk exports (registrar audits)
+export_api = Blueprint('export_api', __name__)
+
+# How many rows the ORM fetches from the database at a time
+CHUNK_SIZE = 1000
+
+# The columns of each export, in the same shape as the model's to_dict()
+EXPORT_FIELDS = {
+    'attendance': ['id', 'user_id', 'course_code', 'date', 'session_date', 'status'],
+    'assignments': ['id', 'user_id', 'course_code', 'title', 'description', 'due_date', 'completed', 'overdue'],
+}
+
+
+# --- Helper functions for exports ---
+
+def parse_date_filter(name):
+    # Turn ?since= / ?until= into a datetime (raises ValueError on bad input)
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
+
+def build_query(model, date_column, user_id=None):
+    # Apply the optional user, course and date range filters (only the exported columns are fetched)
+    query = select_rows(model)
+    if user_id is not None:
+        query = query.filter(model.user_id == user_id)
+    course_code = request.args.get('course_code')
+    if course_code:
+        query = query.filter(model.course_code == course_code)
+
+    since = parse_date_filter('since')
+    if since:
+        query = query.filter(date_column >= since)
+    until = parse_date_filter('until')
+    if until:
+        query = query.filter(date_column < until)
+
+    # Stable order so incremental pulls can resume with ?after=<last id>
+    after = request.args.get('after', type=int)
+    if after is not None:
+        query = query.filter(model.id > after)
+    return query.order_by(model.id).yield_per(CHUNK_SIZE)
+
+def generate_ndjson(model, query):
+    # One JSON object per line; only one chunk of rows is in memory at a time
+    now = datetime.utcnow()
+    for row in query:
+        yield dumps(row_to_dict(model, row, now)) + b'\n'
+
+def generate_csv(model, query, fields):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    count = 0
+    now = datetime.utcnow()
+    for row in query:
+        writer.writerow(row_to_dict(model, row, now))
+        count += 1
+        # Flush the buffer every chunk so the response keeps streaming
+        if count % CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+def stream_export(name, model, date_column):
+    # Students may only export their own rows; leaving out ?user_id= means "mine"
+    user_id = request.args.get('user_id', type=int)
+    if user_id is not None and not can_act_for(user_id):
+        return forbidden()
+    if user_id is None and g.current_user is not None and g.current_user.get('role') != ADMIN_ROLE:
+        user_id = g.current_user['uid']
+
+    try:
+        query = build_query(model, date_column, user_id)
+    except ValueError:
+        return jsonify({'message': 'Invalid since/until format. Use YYYY-MM-DDTHH:MM:SS format.'}), 400
+
+    export_format = request.args.get('format', 'ndjson')
+    if export_format == 'ndjson':
+        body = generate_ndjson(model, query)
+        mimetype = 'application/x-ndjson'
+    elif export_format == 'csv':
+        body = generate_csv(model, query, EXPORT_FIELDS[name])
+        mimetype = 'text/csv'
+    else:
+        return jsonify({'message': 'Unknown format. Use ndjson or csv.'}), 400
+
+    # stream_with_context keeps the database session alive while the generator runs
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={name}.{export_format}'
+    return response
+
+
+# --- 1. EXPORT ATTENDANCE ---
+@export_api.route('/attendance', methods=['GET'])
+@token_required
+@query_budget(GET=1)
+def export_attendance():
+    return stream_export('attendance', Attendance, Attendance.timestamp)
+
+# --- 2. EXPORT ASSIGNMENTS ---
+@export_api.route('/assignments', methods=['GET'])
+@token_required
+@query_budget(GET=1)
+def export_assignments():
+    return stream_export('assignments', Assignment, Assignment.due_date)
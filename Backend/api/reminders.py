@@ -0,0 +1,35 @@
+from flask import Blueprint, jsonify, request
+from models import db, Reminder # Import necessary items
+from query_budget import query_budget # Most SQL statements each route may run
+from tokens import token_required # Checks the signed login token
+from datetime import datetime
+
+# Create a Blueprint for deadline reminders (queued by the scanner in reminders.py)
+reminders_api = Blueprint('reminders_api', __name__)
+
+# --- 1. GET A USER'S WAITING REMINDERS ---
+@reminders_api.route('/<int:user_id>', methods=['GET'])
+@token_required
+@query_budget(GET=1)
+def get_reminders(user_id):
+    waiting = Reminder.query.filter_by(user_id=user_id, delivered_at=None) \
+        .order_by(Reminder.due_date) \
+        .all()
+    return jsonify([reminder.to_dict() for reminder in waiting])
+
+# --- 2. MARK REMINDERS AS DELIVERED ---
+@reminders_api.route('/<int:user_id>/delivered', methods=['POST'])
+@token_required
+@query_budget(POST=1)
+def mark_delivered(user_id):
+    data = request.get_json() or {}
+    ids = data.get('ids')
+
+    if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+        return jsonify({'message': 'Send an "ids" list of reminder IDs'}), 400
+
+    # One UPDATE for the whole list, limited to this user's reminders
+    updated = Reminder.query.filter(Reminder.user_id == user_id, Reminder.id.in_(ids), Reminder.delivered_at.is_(None)) \
+        .update({'delivered_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    return jsonify({'delivered': updated})
@@ -0,0 +1,85 @@
+from flask import Blueprint, jsonify, request, Response, current_app
+from query_budget import query_budget # Most SQL statements each route may run
+from tokens import token_required # Checks the signed login token
+from events import change_feed, read_changes # The change log, polled once per server process
+
+# Create a Blueprint for the Server-Sent Events change feed
+stream_api = Blueprint('stream_api', __name__)
+
+# Topics a client can subscribe to
+TOPICS = ('announcements', 'courses')
+
+
+# --- Helpers for the event stream ---
+
+def format_event(event_id, topic, event, data):
+    # One SSE message: the id (a change number) lets the browser resume with Last-Event-ID
+    return f'id: {event_id}\nevent: {topic}.{event}\ndata: {data}\n\n'
+
+def generate_events(feed, last_id, topics, backlog, heartbeat, retry_ms):
+    # Tell the browser how long to wait before reconnecting
+    yield f'retry: {retry_ms}\n\n'
+    for event_id, topic, event, data in backlog:
+        # (a reset is for every client, whatever its topics)
+        if topic in topics or topic == 'stream':
+            yield format_event(event_id, topic, event, data)
+
+    while True:
+        events, missed, newest = feed.since(last_id, topics)
+        if missed:
+            # Too old to replay (or from another database): the client should refetch everything
+            yield format_event(newest, 'stream', 'reset', '{}')
+        for event_id, topic, event, data in events:
+            yield format_event(event_id, topic, event, data)
+        last_id = newest
+
+        # Sleep until the poller reads something new; send a comment line as a heartbeat
+        # so proxies keep the connection open
+        if not feed.wait(last_id, heartbeat):
+            yield ': heartbeat\n\n'
+
+
+# --- 1. SUBSCRIBE TO CHANGES ---
+@stream_api.route('', methods=['GET'])
+@token_required
+@query_budget(GET=3)
+def stream_changes():
+    topics = request.args.get('topics', ','.join(TOPICS)).split(',')
+    if not topics or any(topic not in TOPICS for topic in topics):
+        return jsonify({'message': f'Unknown topic. Choose from: {", ".join(TOPICS)}'}), 400
+
+    # Browsers send Last-Event-ID when they reconnect; ?last_event_id= works for other clients
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        return jsonify({'message': 'Invalid Last-Event-ID'}), 400
+
+    feed = change_feed(current_app._get_current_object())
+    if not feed.subscribe(current_app.config['STREAM_MAX_CLIENTS']):
+        retry_after = max(1, current_app.config['STREAM_RETRY_MS'] // 1000)
+        return jsonify({'message': 'Too many open change streams, please try again'}), 503, {'Retry-After': str(retry_after)}
+
+    # Event ids are change numbers, so an id from any worker can be resumed here. Changes
+    # from before this process started listening are read from the change log once
+    # (3 statements); past the buffer's size, or past pruned tombstones, the client is
+    # told to refetch instead.
+    backlog = []
+    if last_id is None:
+        last_id = feed.last_id
+    elif last_id < feed.start_seq:
+        if last_id >= feed.pruned_seq:
+            backlog = read_changes(last_id, feed.start_seq, limit=feed.history + 1)
+        if last_id < feed.pruned_seq or len(backlog) > feed.history:
+            backlog = [(feed.start_seq, 'stream', 'reset', '{}')]
+        last_id = feed.start_seq
+
+    body = generate_events(feed, last_id, set(topics), backlog,
+                           current_app.config['STREAM_HEARTBEAT_SECONDS'],
+                           current_app.config['STREAM_RETRY_MS'])
+    response = Response(body, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # Don't let nginx buffer the stream
+    # Runs when the client disconnects (or the server closes the stream)
+    response.call_on_close(feed.unsubscribe)
+    return response
@@ -0,0 +1,108 @@
+from flask import Blueprint, jsonify, request, g
+from models import db, Announcement, Course, Assignment, Attendance, Tombstone # Import necessary items
+from query_budget import query_budget # Most SQL statements each route may run
+from tokens import token_required # Checks the signed login token
+from serializers import select_rows, row_to_dict, json_response # Fast list serialization
+from change_log import change_horizon # Number of the latest change, and of the newest pruned delete
+from datetime import datetime
+
+# Create a Blueprint for delta sync
+sync_api = Blueprint('sync_api', __name__)
+
+# (name in the response, model, rows belong to one student?)
+SYNC_TABLES = [
+    ('courses', Course, False),
+    ('announcements', Announcement, False),
+    ('assignments', Assignment, True),
+    ('attendance', Attendance, True),
+]
+
+# Rows per table per response (?limit=)
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+# --- 1. EVERYTHING THAT CHANGED SINCE ?since= ---
+# Reads only the changed rows through the version indexes, so a poll costs O(changes)
+# instead of O(table). Courses and announcements are shared; assignments and attendance
+# are the caller's own (the token's user, or ?user_id= when auth is off).
+#
+# Response: {'seq', 'has_more', 'changes': {name: [rows]}, 'deleted': {name: [ids]}}.
+# Apply 'deleted' before 'changes' (an ID can be reused after a delete), keep 'seq'
+# and pass it as ?since= next time. While 'has_more' is true, call again straight away.
+# Tombstones are pruned after a while (flask --app app prune-tombstones): a ?since= from
+# before the pruned ones gets 410 with 'resync_required', and the client drops its copy
+# and syncs again from since=0.
+@sync_api.route('', methods=['GET'])
+@token_required
+@query_budget(GET=6)
+def sync_changes():
+    since = request.args.get('since', 0, type=int)
+    if since < 0:
+        return jsonify({'message': 'since must be 0 or a seq from an earlier sync'}), 400
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    if g.current_user is not None:
+        user_id = g.current_user['uid']
+    else:
+        user_id = request.args.get('user_id', type=int)
+
+    # Everything up to this number is already committed; later writes wait for the next sync
+    latest, pruned = change_horizon()
+    if 0 < since < pruned:
+        # Deletes after `since` may be gone, so the client can't tell which of its rows are stale
+        return jsonify({
+            'message': 'Deletes since this seq were pruned; drop the local copy and sync again from since=0',
+            'resync_required': True,
+            'seq': 0
+        }), 410
+    now = datetime.utcnow()
+
+    changes = {}
+    truncated = [] # Last seq returned by each list that hit the limit
+    for name, model, per_user in SYNC_TABLES:
+        if per_user and user_id is None:
+            continue
+        query = select_rows(model).add_columns(model.version) \
+            .filter(model.version > since, model.version <= latest)
+        if per_user:
+            query = query.filter(model.user_id == user_id)
+        rows = query.order_by(model.version).limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            truncated.append(rows[-1][-1])
+
+        changes[name] = []
+        for row in rows:
+            data = row_to_dict(model, row, now)
+            data['version'] = row[-1]
+            changes[name].append(data)
+
+    # Deletes: shared rows, plus the caller's own
+    owner = Tombstone.user_id.is_(None)
+    if user_id is not None:
+        owner = owner | (Tombstone.user_id == user_id)
+    tombstones = db.session.query(Tombstone.seq, Tombstone.table_name, Tombstone.row_id) \
+        .filter(Tombstone.seq > since, Tombstone.seq <= latest, owner) \
+        .order_by(Tombstone.seq) \
+        .limit(limit + 1) \
+        .all()
+    if len(tombstones) > limit:
+        tombstones = tombstones[:limit]
+        truncated.append(tombstones[-1][0])
+
+    table_names = {model.__tablename__: name for name, model, _ in SYNC_TABLES}
+    deleted = {name: [] for name in changes}
+    for _, table_name, row_id in tombstones:
+        if table_names[table_name] in deleted:
+            deleted[table_names[table_name]].append(row_id)
+
+    # If a list was cut short, resume from the earliest cut. Rows after it may come
+    # again next time; applying them twice is harmless.
+    return json_response({
+        'seq': min(truncated) if truncated else latest,
+        'has_more': bool(truncated),
+        'changes': changes,
+        'deleted': deleted
+    })
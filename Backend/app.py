@@ -1,52 +1,313 @@
+import os
+import time
+import click
 from flask import Flask
 from models import db  # Import the database object
+from storage import configure_storage, install_pragmas # SQLite tuning profiles
+from cache import init_cache # Shared cache for the catalog GET routes
+from hashing import configure_hashing # Password hashing process pool
+from compression import init_compression # gzip/deflate/brotli responses
+from metrics import init_metrics # Request timing, SQL counts and the metrics endpoint
+from query_budget import init_query_budget # Per-route SQL statement budgets
 # Import the logic for each module
 from api.announcements import announcement_api 
 from api.courses import course_api
 from api.auth import auth_api # Import the Auth Blueprint
 from api.attendance import attendance_api # Import the Attendance Blueprint
 from api.assignments import assignments_api
+from api.export import export_api # Streaming NDJSON/CSV exports
+from api.batch import batch_api # Many sub-requests in one round-trip
+from api.dashboard import dashboard_api # Per-student dashboard in one call
+from api.reminders import reminders_api # Deadline reminders queued by the scanner
+from api.stream import stream_api # Server-Sent Events change feed
+from api.sync import sync_api # Rows changed since a client's last sync
 
 
 # --- 1. SETUP ---
 
-# Create the main server app
-app = Flask(__name__)
+# Signs tokens on a development machine only: anyone can read it here, so anyone could
+# sign a token with it. create_app refuses it when AUTH_REQUIRED is on.
+DEV_SECRET_KEY = 'dev-secret-change-me'
 
-# Tell the app where the database file is
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///campus_data.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# gunicorn worker classes that serve each connection on a greenlet instead of a thread
+ASYNC_WORKER_CLASSES = ('gevent', 'eventlet')
 
-# Connect the database object to the app
-db.init_app(app)
+def default_stream_clients():
+    # Idle streams a server process can hold, for the worker class gunicorn.conf.py picks
+    if os.environ.get('CAMPUS_WORKER_CLASS', 'gthread') in ASYNC_WORKER_CLASSES:
+        return 1000
+    return max(1, int(os.environ.get('CAMPUS_THREADS', 4)) // 2)
+
+# Settings every app starts with; create_app(config) can override any of them
+DEFAULT_CONFIG = {
+    'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+
+    # How many cached GET responses to keep before the oldest are evicted
+    'RESPONSE_CACHE_SIZE': 512,
+    # Seconds a server process reuses the tables' change numbers for its cache keys: a write
+    # made by another process can take this long to show (its own writes show at once)
+    'RESPONSE_CACHE_VERSION_SECONDS': 1.0,
+
+    # Compress JSON/CSV bodies bigger than COMPRESS_MIN_SIZE bytes for clients that accept it
+    'COMPRESS_MIN_SIZE': 500,
+    'COMPRESS_LEVEL': 6,
+
+    # Signed login tokens: the signing key, how long a token lasts (seconds),
+    # whether routes reject requests that don't send one, and how often each
+    # server process looks for tokens logged out in the other processes (seconds)
+    'SECRET_KEY': os.environ.get('CAMPUS_SECRET_KEY'),
+    'TOKEN_MAX_AGE': 12 * 60 * 60,
+    'AUTH_REQUIRED': os.environ.get('CAMPUS_AUTH_REQUIRED') == '1',
+    'TOKEN_REVOCATION_REFRESH_SECONDS': 5,
+
+    # Password hashing: algorithm/cost, number of hashing processes and queue size.
+    # The processes are per server process, and gunicorn already runs a worker per core,
+    # so one each is enough (CAMPUS_PASSWORD_HASH_WORKERS for a single-process server).
+    'PASSWORD_HASH_METHOD': 'scrypt:32768:8:1',
+    'PASSWORD_HASH_WORKERS': int(os.environ.get('CAMPUS_PASSWORD_HASH_WORKERS', 1)),
+    'PASSWORD_HASH_QUEUE_LIMIT': 64,
+
+    # Request metrics: sample everything normally, 1 in 10 when over 64 requests are in flight,
+    # and log any SQL statement slower than 250 ms
+    'METRICS_SAMPLE_RATE': 1.0,
+    'METRICS_LOAD_THRESHOLD': 64,
+    'METRICS_LOAD_SAMPLE_RATE': 0.1,
+    'SLOW_QUERY_SECONDS': 0.25,
+
+    # What to do when a route runs more SQL statements than its @query_budget:
+    # 'off', 'warn' (log it) or 'raise' (fail the request; use this in tests)
+    'QUERY_BUDGET_MODE': os.environ.get('CAMPUS_QUERY_BUDGET_MODE', 'warn'),
+
+    # Change feed: seconds between keep-alive comments on an idle stream, and how long
+    # browsers wait before reconnecting after the connection drops
+    'STREAM_HEARTBEAT_SECONDS': 15,
+    'STREAM_RETRY_MS': 3000,
+    # How often each server process reads the change log while streams are open, and how
+    # many events it keeps for clients that reconnect with Last-Event-ID
+    'STREAM_POLL_SECONDS': 1.0,
+    'STREAM_HISTORY': 1000,
+    # Open streams per server process; more get a 503. A gthread worker spends a thread on
+    # each, so by default half of CAMPUS_THREADS; an async worker (CAMPUS_WORKER_CLASS=gevent)
+    # only a few KB per idle stream, so a thousand.
+    'STREAM_MAX_CLIENTS': int(os.environ.get('CAMPUS_STREAM_MAX_CLIENTS', default_stream_clients())),
+
+    # Where archived terms' attendance files go (None = an 'archive' folder next to the database)
+    'ARCHIVE_DIR': os.environ.get('CAMPUS_ARCHIVE_DIR'),
+
+    # Days prune-tombstones keeps delete records for /api/sync; a client that hasn't
+    # synced for longer has to sync again from 0
+    'TOMBSTONE_RETENTION_DAYS': int(os.environ.get('CAMPUS_TOMBSTONE_RETENTION_DAYS', 90)),
+}
+
+
+def create_app(config=None):
+    # Build a new app. Nothing here touches the database schema (see init_db below),
+    # so it is cheap to call once in a preforking server before the workers start.
+    app = Flask(__name__)
+    app.config.update(DEFAULT_CONFIG)
+    app.config.update(config or {})
+
+    # Anyone who knows the signing key can make a token for any user
+    if app.config['AUTH_REQUIRED'] and app.config['SECRET_KEY'] in (None, '', DEV_SECRET_KEY):
+        raise RuntimeError('CAMPUS_AUTH_REQUIRED is on: set CAMPUS_SECRET_KEY to a long random value')
+    app.config['SECRET_KEY'] = app.config['SECRET_KEY'] or DEV_SECRET_KEY
+
+    # Tell the app where the database file is and how to tune it
+    # (set CAMPUS_DB_PROFILE=development|production and DATABASE_URL to override)
+    configure_storage(app, app.config.get('CAMPUS_DB_PROFILE'))
+
+    init_cache(app)
+    configure_hashing(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        queue_limit=app.config['PASSWORD_HASH_QUEUE_LIMIT']
+    )
+
+    # Connect the database object to the app
+    db.init_app(app)
+
+    # Apply the profile's PRAGMAs (WAL, cache size, busy timeout...) to every new connection
+    with app.app_context():
+        install_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+
+    # Per-endpoint latency/SQL metrics at /api/_metrics (registered before compression,
+    # so response sizes are the bytes actually sent)
+    init_metrics(app)
+    init_compression(app)
+    init_query_budget(app)
+
+    register_blueprints(app)
+    register_commands(app)
+    return app
 
 
 # --- 2. LOAD MODULES ---
 
-# Load the announcements logic and set its base URL
-app.register_blueprint(announcement_api, url_prefix='/api/announcements')
+def register_blueprints(app):
+    # Load the announcements logic and set its base URL
+    app.register_blueprint(announcement_api, url_prefix='/api/announcements')
 
-# Load the courses logic and set its base URL
-app.register_blueprint(course_api, url_prefix='/api/courses')
+    # Load the courses logic and set its base URL
+    app.register_blueprint(course_api, url_prefix='/api/courses')
 
-#Load the authentication logic and set its base URL
-app.register_blueprint(auth_api, url_prefix='/api/auth') # <---THIS LINE IS CRITICAL
+    #Load the authentication logic and set its base URL
+    app.register_blueprint(auth_api, url_prefix='/api/auth') # <---THIS LINE IS CRITICAL
 
-#Load the attendance tracking logic
-app.register_blueprint(attendance_api, url_prefix='/api/attendance')
+    #Load the attendance tracking logic
+    app.register_blueprint(attendance_api, url_prefix='/api/attendance')
+
+    #Load the assignments and exams tracking logic
+    app.register_blueprint(assignments_api, url_prefix='/api/assignments')
+
+    #Load the bulk export logic (registrar audits)
+    app.register_blueprint(export_api, url_prefix='/api/export')
+
+    #Load the student dashboard logic
+    app.register_blueprint(dashboard_api, url_prefix='/api/dashboard')
+
+    #Load the deadline reminders logic
+    app.register_blueprint(reminders_api, url_prefix='/api/reminders')
+
+    #Load the change feed logic
+    app.register_blueprint(stream_api, url_prefix='/api/stream')
+
+    #Load the delta sync logic
+    app.register_blueprint(sync_api, url_prefix='/api/sync')
+
+    #Load the batch logic (runs sub-requests against the blueprints above)
+    app.register_blueprint(batch_api, url_prefix='/api/batch')
 
-#Load the assignments and exams tracking logic
-app.register_blueprint(assignments_api, url_prefix='/api/assignments')
 
 # --- 3. CREATE DATABASE TABLES ---
 
-# This runs once to make sure all tables (Announcement, Course) exist
-with app.app_context():
-    db.create_all()
+def init_db(app):
+    # Make sure all tables, indexes and triggers exist. Run it once per deploy
+    # (flask --app app init-db), not in every worker.
+    from attendance_stats import upgrade_attendance_table, install_attendance_triggers, rebuild_attendance_stats
+    from archive import upgrade_attendance_ids
+    from change_log import upgrade_change_columns, install_change_triggers
+    from announcement_search import install_announcement_search, rebuild_announcement_search
+    from reminders import install_reminder_triggers
+    with app.app_context():
+        db.create_all()
+        upgraded = upgrade_attendance_table()
+        upgrade_change_columns()
+        upgrade_attendance_ids()
+
+        # create_all skips tables that already exist, so add any index they are missing
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(db.engine, checkfirst=True)
+
+        install_attendance_triggers()
+        install_change_triggers()
+        install_reminder_triggers()
+        if upgraded:
+            rebuild_attendance_stats()
+        # A new search index starts empty; fill it from the posts already there
+        if install_announcement_search():
+            rebuild_announcement_search()
+
+
+# --- 4. MAINTENANCE COMMANDS ---
+
+def register_commands(app):
+    # Create the tables: flask --app app init-db
+    @app.cli.command('init-db')
+    def init_db_command():
+        start = time.perf_counter()
+        init_db(app)
+        print(f"Database schema is ready ({(time.perf_counter() - start) * 1000:.1f} ms).")
+
+    # Recompute the attendance totals from the raw rows: flask --app app rebuild-attendance-stats
+    @app.cli.command('rebuild-attendance-stats')
+    def rebuild_attendance_stats_command():
+        from attendance_stats import rebuild_attendance_stats
+        count = rebuild_attendance_stats()
+        print(f"Rebuilt attendance totals for {count} student/course pairs.")
+
+    # Re-index every announcement for search: flask --app app rebuild-search-index
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        from announcement_search import rebuild_announcement_search
+        count = rebuild_announcement_search()
+        print(f"Re-indexed {count} announcements for search.")
+
+    # Move a finished term's attendance out of the hot database:
+    # flask --app app archive-term 2026-spring --start 2026-01-12 --end 2026-05-15 [--vacuum]
+    @app.cli.command('archive-term')
+    @click.argument('name')
+    @click.option('--start', required=True, type=click.DateTime(formats=['%Y-%m-%d']), help='First class day.')
+    @click.option('--end', required=True, type=click.DateTime(formats=['%Y-%m-%d']), help='Last class day.')
+    @click.option('--vacuum', is_flag=True, help='Shrink the database file afterwards (locks it while it runs).')
+    def archive_term_command(name, start, end, vacuum):
+        from archive import archive_term, archive_path, vacuum as vacuum_database
+        started = time.perf_counter()
+        try:
+            term = archive_term(name, start.date(), end.date())
+        except ValueError as error:
+            raise click.ClickException(str(error))
+        print(f"Archived {term.rows} marks of {term.name} to {archive_path(term)} "
+              f"({time.perf_counter() - started:.1f}s).")
+        if vacuum:
+            vacuum_database()
+            print("Database file compacted.")
+
+    # Forget deletes older than the retention period (run it daily, e.g. from cron):
+    # flask --app app prune-tombstones [--days 90]
+    @app.cli.command('prune-tombstones')
+    @click.option('--days', type=click.IntRange(min=1), default=None,
+                  help='Keep this many days of deletes (default: TOMBSTONE_RETENTION_DAYS).')
+    def prune_tombstones_command(days):
+        from change_log import prune_tombstones
+        days = days or app.config['TOMBSTONE_RETENTION_DAYS']
+        started = time.perf_counter()
+        deleted, horizon = prune_tombstones(days)
+        print(f"Pruned {deleted} tombstones older than {days} days ({time.perf_counter() - started:.2f}s).")
+        if horizon:
+            print(f"Clients that last synced before change {horizon} must sync again from 0.")
+
+    # Check the whole course catalog for room/professor clashes: flask --app app check-timetable
+    @app.cli.command('check-timetable')
+    def check_timetable_command():
+        from models import Course
+        from timetable import find_conflicts
+        started = time.perf_counter()
+        report = find_conflicts(db.session.query(Course.id, Course.code, Course.room, Course.prof, Course.time).all())
+        for conflict in report['conflicts']:
+            print(f"{conflict['kind']} {conflict['resource']}: {' and '.join(conflict['courses'])} "
+                  f"({', '.join(conflict['when'])})")
+        for course in report['unparsed']:
+            print(f"unreadable time for {course['code']}: {course['time_slot']!r} ({course['message']})")
+        print(f"Checked {report['courses']} courses in {time.perf_counter() - started:.2f}s: "
+              f"{len(report['conflicts'])} clashes, {len(report['unparsed'])} unreadable, "
+              f"{report['unscheduled']} unscheduled.")
+
+    # Queue deadline reminders in the background: flask --app app scan-deadlines [--once]
+    # (run it as one separate process, not inside every web worker)
+    @app.cli.command('scan-deadlines')
+    @click.option('--once', is_flag=True, help='Run a single scan and exit.')
+    def scan_deadlines_command(once):
+        from reminders import DeadlineScanner
+        scanner = DeadlineScanner(app)
+        if once:
+            print(scanner.run_cycle())
+            scanner.stop()
+            return
+        print(f"Scanning deadlines every {app.config['REMINDER_SCAN_INTERVAL']}s (Ctrl+C to stop)...")
+        scanner.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            scanner.stop()
 
 
-# --- 4. START THE SERVER ---
+# --- 5. START THE SERVER ---
 
+# Development server only; production runs wsgi.py under gunicorn (see gunicorn.conf.py)
 if __name__ == '__main__':
     print("Starting Campus Companion server...")
-    app.run(debug=True)
\ No newline at end of file
+    app = create_app()
+    init_db(app)
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1')
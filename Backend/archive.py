@@ -0,0 +1,276 @@
+import os
+import re
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import MetaData, delete, func, insert, select, text, union_all
+from sqlalchemy.schema import CreateTable
+from models import db, Attendance, AttendanceStats, ArchivedTerm, ArchivedAttendanceStats
+from attendance_stats import ATTENDANCE_STATS_TRIGGERS
+from change_log import change_triggers
+
+# --- 1. SETTINGS ---
+
+# SQLite can attach at most 10 databases to one connection; keep a couple spare
+MAX_ATTACHED_TERMS = 8
+
+# Columns copied into an archive file, in the order of the attendance table
+ARCHIVED_COLUMNS = 'id, user_id, course_code, timestamp, is_present, session_date'
+
+# The term's hot marks that have an identical row in the archive file
+ARCHIVED_COLUMNS_MATCH = (
+    'SELECT 1 FROM main.attendance AS m JOIN archive.attendance AS a ON a.id = m.id '
+    'WHERE m.session_date BETWEEN :start AND :end '
+    + ' '.join(f'AND a.{column} IS m.{column}' for column in ARCHIVED_COLUMNS.split(', ')[1:])
+)
+
+# Each archive file holds one term's marks and the per-student totals for that term
+ARCHIVE_SCHEMA = [
+    '''
+    CREATE TABLE archive.attendance (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        course_code VARCHAR(10) NOT NULL,
+        timestamp DATETIME,
+        is_present BOOLEAN NOT NULL,
+        session_date DATE NOT NULL
+    )
+    ''',
+    'CREATE INDEX archive.ix_attendance_user_session ON attendance (user_id, session_date)',
+    '''
+    CREATE TABLE archive.attendance_stats (
+        user_id INTEGER NOT NULL,
+        course_code VARCHAR(10) NOT NULL,
+        present INTEGER NOT NULL,
+        total INTEGER NOT NULL,
+        PRIMARY KEY (user_id, course_code)
+    )
+    ''',
+]
+
+# The hot table's delete triggers, dropped while a term moves out: the totals are
+# adjusted in one statement instead of row by row, and archived marks are history,
+# not deletes, so they leave no sync tombstones
+DELETE_TRIGGERS = ['attendance_stats_after_delete', 'attendance_change_after_delete']
+
+
+def archive_dir():
+    # Next to the database by default (CAMPUS_ARCHIVE_DIR overrides it)
+    return current_app.config.get('ARCHIVE_DIR') or os.path.join(current_app.instance_path, 'archive')
+
+def archive_path(term):
+    return os.path.join(archive_dir(), term.file_name)
+
+
+# --- 2. CLOSING A TERM ---
+
+def archive_term(name, start, end):
+    # Move every mark with start <= session_date <= end into its own SQLite file.
+    # Raises ValueError when the term can't be archived (nothing is changed then).
+    if not re.fullmatch(r'[\w-]{1,30}', name):
+        raise ValueError('Use letters, digits, - or _ for the term name (at most 30)')
+    if start > end:
+        raise ValueError('The term must start before it ends')
+    if end >= datetime.utcnow().date():
+        raise ValueError('Only terms that are over can be archived')
+    if db.session.get(ArchivedTerm, name) is not None:
+        raise ValueError(f"Term '{name}' is already archived")
+    overlapping = ArchivedTerm.query.filter(ArchivedTerm.start_date <= end, ArchivedTerm.end_date >= start).first()
+    if overlapping is not None:
+        raise ValueError(f"Those dates overlap the archived term '{overlapping.name}'")
+
+    term = ArchivedTerm(name=name, start_date=start, end_date=end, file_name=f'attendance_{name}.db')
+    path = archive_path(term)
+    if os.path.exists(path):
+        raise ValueError(f'{path} already exists; remove it if a failed run left it behind')
+    os.makedirs(archive_dir(), exist_ok=True)
+    bounds = {'start': start.isoformat(), 'end': end.isoformat()}
+
+    # 1. Copy the marks and the term's totals into the archive file, and commit it first.
+    # (With WAL, a transaction over two files is not atomic across both, so the hot
+    # database only lets go of the rows once the archive is safely on disk.)
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql('ATTACH DATABASE ? AS archive', (path,))
+        try:
+            for statement in ARCHIVE_SCHEMA:
+                conn.exec_driver_sql(statement)
+            copied = conn.execute(text(
+                f'INSERT INTO archive.attendance ({ARCHIVED_COLUMNS}) SELECT {ARCHIVED_COLUMNS} '
+                'FROM main.attendance WHERE session_date BETWEEN :start AND :end'
+            ), bounds).rowcount
+            conn.execute(text(
+                'INSERT INTO archive.attendance_stats (user_id, course_code, present, total) '
+                'SELECT user_id, course_code, SUM(is_present), COUNT(*) FROM archive.attendance '
+                'GROUP BY user_id, course_code'
+            ))
+            conn.commit()
+        finally:
+            conn.exec_driver_sql('DETACH DATABASE archive')
+
+    # 2. In one write transaction on the hot database (BEGIN IMMEDIATE takes the write lock
+    # first, so no mark can change until the commit): check that the term's marks are still
+    # exactly the copied ones, keep the copy's totals, take them off the running totals and
+    # delete the marks. Only the hot file is written here, so this step is atomic.
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql('ATTACH DATABASE ? AS archive', (path,))
+        try:
+            conn.exec_driver_sql('BEGIN IMMEDIATE')
+            hot, same = conn.execute(text(
+                'SELECT (SELECT COUNT(*) FROM main.attendance WHERE session_date BETWEEN :start AND :end), '
+                f'(SELECT COUNT(*) FROM ({ARCHIVED_COLUMNS_MATCH}))'
+            ), bounds).one()
+            if not hot == same == copied:
+                # A mark for the term arrived or changed between the two steps
+                raise ValueError('Marks of the term changed while it was being copied; run it again')
+
+            conn.execute(text(
+                'INSERT INTO archived_attendance_stats (term, user_id, course_code, present, total) '
+                'SELECT :term, user_id, course_code, present, total FROM archive.attendance_stats'
+            ), {'term': name})
+            conn.execute(text(
+                'UPDATE attendance_stats SET present = attendance_stats.present - s.present, '
+                'total = attendance_stats.total - s.total '
+                'FROM archived_attendance_stats AS s WHERE s.term = :term '
+                'AND s.user_id = attendance_stats.user_id AND s.course_code = attendance_stats.course_code'
+            ), {'term': name})
+            conn.execute(delete(AttendanceStats).where(AttendanceStats.total <= 0))
+
+            for trigger in DELETE_TRIGGERS:
+                conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {trigger}')
+            moved = conn.execute(delete(Attendance).where(Attendance.session_date.between(start, end))).rowcount
+            for statement in ATTENDANCE_STATS_TRIGGERS + change_triggers('attendance', 'user_id'):
+                conn.execute(text(statement))
+
+            term.rows = moved
+            conn.execute(insert(ArchivedTerm).values(
+                name=name, start_date=start, end_date=end, file_name=term.file_name, rows=moved
+            ))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            os.remove(path)
+            raise
+        finally:
+            conn.exec_driver_sql('DETACH DATABASE archive')
+    db.session.expire_all()
+    return term
+
+def term_containing(day):
+    # The archived term a class day falls in, or None. Its marks are closed: they live
+    # in the archive file now, so a new mark for that day would be counted twice.
+    return ArchivedTerm.query.filter(ArchivedTerm.start_date <= day, ArchivedTerm.end_date >= day).first()
+
+def upgrade_attendance_ids():
+    # Older attendance tables hand out MAX(id) + 1, so once a term's newest marks are
+    # archived their IDs go to new marks, and history shows two marks with one ID.
+    # Rebuild the table with AUTOINCREMENT and start it above every archived mark.
+    # Run it after the other upgrades; init_db then recreates the indexes and triggers.
+    schema = db.session.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'attendance'"
+    )).scalar()
+    if 'AUTOINCREMENT' in schema.upper():
+        return False
+
+    create = str(CreateTable(Attendance.__table__).compile(db.engine))
+    columns = ', '.join(column.name for column in Attendance.__table__.columns)
+    db.session.execute(text(create.replace('CREATE TABLE attendance', 'CREATE TABLE attendance_new', 1)))
+    db.session.execute(text(f'INSERT INTO attendance_new ({columns}) SELECT {columns} FROM attendance'))
+    db.session.execute(text('DROP TABLE attendance'))
+    db.session.execute(text('ALTER TABLE attendance_new RENAME TO attendance'))
+
+    highest = max([_highest_archived_id(term) for term in ArchivedTerm.query.all()], default=0)
+    db.session.execute(text(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'attendance', 0 "
+        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'attendance')"
+    ))
+    db.session.execute(text(
+        "UPDATE sqlite_sequence SET seq = MAX(seq, :highest) WHERE name = 'attendance'"
+    ), {'highest': highest})
+    db.session.commit()
+    return True
+
+def _highest_archived_id(term):
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql('ATTACH DATABASE ? AS archive', (archive_path(term),))
+        try:
+            return conn.exec_driver_sql('SELECT COALESCE(MAX(id), 0) FROM archive.attendance').scalar()
+        finally:
+            conn.rollback()
+            conn.exec_driver_sql('DETACH DATABASE archive')
+
+def vacuum():
+    # Give the freed pages back to the file system (rewrites the whole database)
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql('VACUUM')
+
+
+# --- 3. HISTORICAL QUERIES ---
+
+def _marks(table, user_id, since, until, course_code):
+    columns = [table.c.id, table.c.user_id, table.c.course_code, table.c.timestamp,
+               table.c.session_date, table.c.is_present]
+    query = select(*columns).where(table.c.user_id == user_id)
+    if since:
+        query = query.where(table.c.session_date >= since)
+    if until:
+        query = query.where(table.c.session_date <= until)
+    if course_code:
+        query = query.where(table.c.course_code == course_code)
+    return query
+
+def attendance_history(user_id, since=None, until=None, course_code=None):
+    # A student's marks between two dates, in the serializers' Attendance column order.
+    # Only the archive files of terms overlapping the dates are attached, for this query only;
+    # a range inside the current term never leaves the hot table. Raises ValueError if the
+    # range spans more than MAX_ATTACHED_TERMS archived terms.
+    terms = ArchivedTerm.query
+    if since:
+        terms = terms.filter(ArchivedTerm.end_date >= since)
+    if until:
+        terms = terms.filter(ArchivedTerm.start_date <= until)
+    terms = terms.order_by(ArchivedTerm.start_date).all()
+    if len(terms) > MAX_ATTACHED_TERMS:
+        raise ValueError(f'Ask for at most {MAX_ATTACHED_TERMS} archived terms at a time')
+
+    hot = _marks(Attendance.__table__, user_id, since, until, course_code)
+    if not terms:
+        return db.session.execute(hot.order_by(Attendance.session_date, Attendance.course_code)).all()
+
+    schemas = [f'term_{index}' for index in range(len(terms))]
+    queries = [hot]
+    for schema in schemas:
+        archived = Attendance.__table__.to_metadata(MetaData(), schema=schema)
+        queries.append(_marks(archived, user_id, since, until, course_code))
+
+    # A connection of its own, so the attached files never leak into the pool's other users
+    with db.engine.connect() as conn:
+        attached = []
+        try:
+            for schema, term in zip(schemas, terms):
+                conn.exec_driver_sql(f'ATTACH DATABASE ? AS {schema}', (archive_path(term),))
+                attached.append(schema)
+            return conn.execute(union_all(*queries).order_by('session_date', 'course_code')).all()
+        finally:
+            conn.rollback()
+            for schema in attached:
+                conn.exec_driver_sql(f'DETACH DATABASE {schema}')
+
+def archived_summary(user_id, term):
+    # Totals for one archived term, or for 'all' the current term plus every archived one
+    if term != 'all':
+        return ArchivedAttendanceStats.query.filter_by(user_id=user_id, term=term) \
+            .order_by(ArchivedAttendanceStats.course_code) \
+            .all()
+
+    every_term = union_all(
+        select(AttendanceStats.course_code, AttendanceStats.present, AttendanceStats.total)
+        .where(AttendanceStats.user_id == user_id),
+        select(ArchivedAttendanceStats.course_code, ArchivedAttendanceStats.present, ArchivedAttendanceStats.total)
+        .where(ArchivedAttendanceStats.user_id == user_id)
+    ).subquery()
+    totals = db.session.execute(
+        select(every_term.c.course_code, func.sum(every_term.c.present), func.sum(every_term.c.total))
+        .group_by(every_term.c.course_code)
+        .order_by(every_term.c.course_code)
+    ).all()
+    return [AttendanceStats(user_id=user_id, course_code=code, present=present, total=total)
+            for code, present, total in totals]
@@ -0,0 +1,79 @@
+from sqlalchemy import func, case, delete, insert, select, text
+from models import db, Attendance, AttendanceStats
+
+# --- 1. TRIGGERS THAT KEEP AttendanceStats IN STEP WITH Attendance ---
+
+# Marks are upserts (a retry updates the existing row instead of adding one), so the
+# totals are maintained by SQLite itself: the triggers see both the old and the new
+# value of a row and run in the same transaction as the change.
+ATTENDANCE_STATS_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS attendance_stats_after_insert AFTER INSERT ON attendance
+    BEGIN
+        INSERT INTO attendance_stats (user_id, course_code, present, total)
+        VALUES (NEW.user_id, NEW.course_code, NEW.is_present, 1)
+        ON CONFLICT (user_id, course_code) DO UPDATE
+        SET present = present + excluded.present, total = total + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS attendance_stats_after_update
+    AFTER UPDATE OF user_id, course_code, is_present ON attendance
+    BEGIN
+        UPDATE attendance_stats SET present = present - OLD.is_present, total = total - 1
+        WHERE user_id = OLD.user_id AND course_code = OLD.course_code;
+        INSERT INTO attendance_stats (user_id, course_code, present, total)
+        VALUES (NEW.user_id, NEW.course_code, NEW.is_present, 1)
+        ON CONFLICT (user_id, course_code) DO UPDATE
+        SET present = present + excluded.present, total = total + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS attendance_stats_after_delete AFTER DELETE ON attendance
+    BEGIN
+        UPDATE attendance_stats SET present = present - OLD.is_present, total = total - 1
+        WHERE user_id = OLD.user_id AND course_code = OLD.course_code;
+    END
+    ''',
+]
+
+
+def install_attendance_triggers():
+    for statement in ATTENDANCE_STATS_TRIGGERS:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+
+# --- 2. UPGRADING AN OLDER attendance TABLE ---
+
+def upgrade_attendance_table():
+    # Databases made before marks were keyed by session date lack the column and the
+    # unique index. Add them, keep the latest mark per student/course/day, and recount.
+    columns = [row[1] for row in db.session.execute(text('PRAGMA table_info(attendance)'))]
+    if 'session_date' in columns:
+        return False
+
+    db.session.execute(text('ALTER TABLE attendance ADD COLUMN session_date DATE'))
+    db.session.execute(text('UPDATE attendance SET session_date = date(timestamp)'))
+    db.session.execute(text(
+        'DELETE FROM attendance WHERE id NOT IN '
+        '(SELECT MAX(id) FROM attendance GROUP BY user_id, course_code, session_date)'
+    ))
+    db.session.commit()
+    return True
+
+
+# --- 3. RECOVERY ---
+
+def rebuild_attendance_stats():
+    # Recompute every total from the raw Attendance rows (for recovery or after a migration)
+    present_count = func.sum(case((Attendance.is_present == True, 1), else_=0))
+    totals = select(Attendance.user_id, Attendance.course_code, present_count, func.count(Attendance.id)) \
+        .group_by(Attendance.user_id, Attendance.course_code)
+
+    db.session.execute(delete(AttendanceStats))
+    db.session.execute(
+        insert(AttendanceStats).from_select(['user_id', 'course_code', 'present', 'total'], totals)
+    )
+    db.session.commit()
+    return db.session.query(func.count()).select_from(AttendanceStats).scalar()
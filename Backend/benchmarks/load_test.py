@@ -0,0 +1,274 @@
+# Drives every blueprint route against a seeded database and reports latency percentiles.
+# Run from the Backend folder (seed first with benchmarks/seed_data.py):
+#   python benchmarks/load_test.py --database /tmp/campus_big.db --requests 200
+#   python benchmarks/load_test.py --database /tmp/campus_big.db --compare benchmarks/results/<old>.json
+#   python benchmarks/load_test.py --url http://127.0.0.1:8000 --concurrency 32   (against a running server)
+import argparse
+import gzip
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# The password benchmarks/seed_data.py gives every user
+SEED_PASSWORD = 'campus123'
+
+# Scenarios that hash a password (slow on purpose); they get a tenth of the requests
+SLOW_SCENARIOS = ('auth.register', 'auth.login', 'auth.logout')
+
+
+# --- 1. THE SCENARIOS ---
+
+# Every route with a @query_budget has a scenario, except the never-ending /api/stream.
+# Updates and deletes act on a row made just for them; that setup runs in the path (or
+# headers) maker, before the clock starts, so only the measured request is timed.
+
+def created(send, path, body):
+    # Make a row through the API and return its id
+    status, data = send('POST', path, body)
+    if status != 201:
+        raise RuntimeError(f'Setup request POST {path} failed with {status}')
+    return json.loads(data)['id']
+
+def bearer(send, username):
+    status, data = send('POST', '/api/auth/login', {'username': username, 'password': SEED_PASSWORD})
+    return {'Authorization': f"Bearer {json.loads(data)['token']}"} if status == 200 else {}
+
+def scenarios(send, students, courses, announcements, rng):
+    # (name, method, path maker, body maker[, headers maker]); each call picks fresh ids
+    user = lambda: rng.randint(1, students)
+    # New usernames and course codes must not collide with an earlier run against the same server
+    run = format(int(time.time()) % 36 ** 4, 'x')
+    serial = itertools.count(1)
+    today = datetime.utcnow().date().isoformat()
+    next_week = (datetime.utcnow() + timedelta(days=7)).replace(microsecond=0).isoformat()
+
+    def new_course():
+        number = next(serial)
+        # A room of its own, so the clash check runs but never finds a clash
+        return {'code': f'L{run}{number}'[:10], 'name': 'Load test', 'room': f'LOAD-{run}-{number}',
+                'time': 'M W F 9:00-9:50'}
+    def new_post():
+        return {'title': 'Load test notice', 'content': 'The room has changed this week.'}
+    def new_assignment():
+        return {'course_code': 'CS100', 'title': 'Load test', 'due_date': next_week}
+    def own_assignment():
+        user_id = user()
+        return f'/api/assignments/{user_id}/{created(send, f"/api/assignments/{user_id}", new_assignment())}'
+
+    return [
+        ('courses.list', 'GET', lambda: '/api/courses/', None),
+        ('courses.single', 'GET', lambda: f'/api/courses/{rng.randint(1, courses)}', None),
+        ('courses.create', 'POST', lambda: '/api/courses/', new_course),
+        ('courses.update', 'PUT', lambda: f"/api/courses/{created(send, '/api/courses/', new_course())}",
+         lambda: {'room': f'LOAD-{run}-{next(serial)}'}),
+        ('courses.delete', 'DELETE', lambda: f"/api/courses/{created(send, '/api/courses/', new_course())}", None),
+        ('courses.conflicts', 'GET', lambda: '/api/courses/conflicts', None),
+        ('announcements.page', 'GET', lambda: '/api/announcements/?limit=50', None),
+        ('announcements.single', 'GET', lambda: f'/api/announcements/{rng.randint(1, announcements)}', None),
+        ('announcements.search', 'GET', lambda: f"/api/announcements/search?q={rng.choice(['quiz', 'office hours', 'room'])}",
+         None),
+        ('announcements.create', 'POST', lambda: '/api/announcements/', new_post),
+        ('announcements.update', 'PUT', lambda: f"/api/announcements/{created(send, '/api/announcements/', new_post())}",
+         lambda: {'title': 'Load test notice (updated)'}),
+        ('announcements.delete', 'DELETE',
+         lambda: f"/api/announcements/{created(send, '/api/announcements/', new_post())}", None),
+        ('assignments.list', 'GET', lambda: f'/api/assignments/{user()}', None),
+        ('assignments.pending', 'GET', lambda: f'/api/assignments/{user()}?status=pending', None),
+        ('assignments.create', 'POST', lambda: f'/api/assignments/{user()}', new_assignment),
+        ('assignments.update', 'PUT', own_assignment, lambda: {'is_completed': True}),
+        ('assignments.delete', 'DELETE', own_assignment, None),
+        ('attendance.summary', 'GET', lambda: f'/api/attendance/summary/{user()}', None),
+        ('attendance.summary_all', 'GET', lambda: f'/api/attendance/summary/{user()}?term=all', None),
+        ('attendance.history', 'GET', lambda: f'/api/attendance/history/{user()}', None),
+        ('attendance.mark', 'POST', lambda: '/api/attendance/mark',
+         lambda: {'user_id': user(), 'course_code': 'CS100', 'session_date': today, 'is_present': True}),
+        ('attendance.bulk', 'POST', lambda: '/api/attendance/mark/bulk',
+         lambda: {'course_code': 'CS100', 'session_date': today, 'entries': [{'user_id': user()} for _ in range(100)]}),
+        ('dashboard', 'GET', lambda: f'/api/dashboard/{user()}', None),
+        ('reminders.list', 'GET', lambda: f'/api/reminders/{user()}', None),
+        ('reminders.delivered', 'POST', lambda: f'/api/reminders/{user()}/delivered',
+         lambda: {'ids': [rng.randint(1, 1000) for _ in range(5)]}),
+        ('sync', 'GET', lambda: f'/api/sync?since=0&user_id={user()}', None),
+        ('export.attendance', 'GET', lambda: f'/api/export/attendance?user_id={user()}', None),
+        ('export.assignments', 'GET', lambda: f'/api/export/assignments?user_id={user()}', None),
+        ('batch', 'POST', lambda: '/api/batch',
+         lambda: {'requests': [{'path': '/api/courses/'}, {'path': f'/api/dashboard/{user()}'}]}),
+        ('auth.register', 'POST', lambda: '/api/auth/register',
+         lambda: {'username': f'load-{run}-{next(serial)}', 'password': SEED_PASSWORD}),
+        ('auth.login', 'POST', lambda: '/api/auth/login',
+         lambda: {'username': f'student{user()}', 'password': SEED_PASSWORD}),
+        # The headers maker logs in first (untimed) for a token to log out
+        ('auth.logout', 'POST', lambda: '/api/auth/logout', None, lambda: bearer(send, f'student{user()}')),
+    ]
+
+
+# --- 2. RUNNING THEM ---
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(latencies, elapsed, errors):
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+def run_scenario(send, scenario, requests, concurrency):
+    name, method, make_path, make_body = scenario[:4]
+    make_headers = scenario[4] if len(scenario) > 4 else None
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    per_thread = max(1, requests // concurrency)
+
+    def worker():
+        mine = []
+        for _ in range(per_thread):
+            path = make_path()
+            body = make_body() if make_body else None
+            headers = make_headers() if make_headers else None
+            start = time.perf_counter()
+            status, _ = send(method, path, body, headers)
+            mine.append(time.perf_counter() - start)
+            if status >= 400:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(mine)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - start, errors[0])
+
+def test_client_sender(app):
+    # In-process: no sockets, measures the Flask + SQL work only
+    client = app.test_client()
+    def send(method, path, body, headers=None):
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_data()
+    return send
+
+def http_sender(base_url):
+    def send(method, path, body, headers=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        req = urllib.request.Request(base_url.rstrip('/') + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json', 'Accept-Encoding': 'gzip',
+                                              **(headers or {})})
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                data = response.read()
+                if response.headers.get('Content-Encoding') == 'gzip':
+                    data = gzip.decompress(data)
+                return response.status, data
+        except urllib.error.HTTPError as error:
+            return error.code, b''
+        except OSError:
+            return 599, b''
+    return send
+
+
+# --- 3. STORING AND COMPARING RESULTS ---
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def save_results(results, meta):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{meta['commit']}-{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    with open(path, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    return path
+
+def print_table(results, baseline=None):
+    print(f"{'scenario':<22}{'req':>6}{'err':>5}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in results.items():
+        line = (f"{name:<22}{stats['requests']:>6}{stats['errors']:>5}{stats['throughput_rps']:>10}"
+                f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+        old = (baseline or {}).get(name)
+        if old and old['p95_ms']:
+            change = (stats['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100
+            line += f"   p95 {change:+.0f}% vs baseline"
+        print(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Campus Companion backend load benchmark')
+    parser.add_argument('--database', help='Seeded SQLite file (in-process mode)')
+    parser.add_argument('--url', help='Base URL of a running server (HTTP mode)')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--only', help='Comma-separated scenario names to run')
+    parser.add_argument('--compare', help='Earlier results file to compare p95 against')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    if bool(args.database) == bool(args.url):
+        sys.exit('Pass exactly one of --database or --url')
+
+    rng = random.Random(args.seed)
+    if args.database:
+        from app import create_app
+        from models import db, User, Course, Announcement
+        import sqlite3
+        # Work on a copy so the writes don't change the seeded data between runs
+        copy = args.database + '.bench'
+        source, target = sqlite3.connect(args.database), sqlite3.connect(copy)
+        source.backup(target)
+        source.close()
+        target.close()
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.abspath(copy)}'})
+        with app.app_context():
+            counts = [db.session.query(db.func.max(model.id)).scalar() or 1 for model in (User, Course, Announcement)]
+        send = test_client_sender(app)
+    else:
+        counts = [1000, 100, 100]
+        send = http_sender(args.url)
+
+    selected = set(args.only.split(',')) if args.only else None
+    results = {}
+    for scenario in scenarios(send, *counts, rng):
+        if selected and scenario[0] not in selected:
+            continue
+        # Fewer of these: each one is a deliberately slow password hash
+        requests = max(1, args.requests // 10) if scenario[0] in SLOW_SCENARIOS else args.requests
+        results[scenario[0]] = run_scenario(send, scenario, requests, args.concurrency)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_table(results, baseline)
+
+    meta = {'commit': git_commit(), 'mode': 'http' if args.url else 'test_client',
+            'database': args.database or args.url, 'requests': args.requests, 'concurrency': args.concurrency}
+    print(f'Saved {save_results(results, meta)}')
+
+    if args.database:
+        os.remove(copy)
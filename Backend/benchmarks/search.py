@@ -0,0 +1,103 @@
+# Compares announcement search through the FTS5 index (announcement_search.py) with
+# the LIKE scan the ?title= filter does, on a large synthetic notice board.
+# Run from the Backend folder:  python benchmarks/search.py --posts 1000000
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('CAMPUS_DB_PROFILE', 'production')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, init_db # noqa: E402
+from models import db, Announcement # noqa: E402
+from announcement_search import build_match_query, search_announcements # noqa: E402
+
+CHUNK_SIZE = 20000
+PAGE_SIZE = 20
+
+# Common filler words, plus rarer course words so queries range from very to barely selective
+FILLER = ('the class will meet in room please bring your notes and check the schedule for this week '
+          'students should email the office before friday about any questions').split()
+TOPICS = ['midterm', 'quiz', 'lab', 'seminar', 'lecture', 'exam', 'project', 'deadline', 'tutorial',
+          'workshop', 'assignment', 'grades', 'syllabus', 'library', 'parking', 'scholarship']
+RARE = [f'thesis{i}' for i in range(2000)]
+
+
+def post(rng):
+    topic = rng.choice(TOPICS)
+    words = rng.choices(FILLER, k=rng.randint(15, 60))
+    for _ in range(rng.randint(1, 3)):
+        words.insert(rng.randrange(len(words)), rng.choice(TOPICS))
+    if rng.random() < 0.01:
+        words.insert(rng.randrange(len(words)), rng.choice(RARE))
+    return {'title': f'{topic.title()} update', 'text': ' '.join(words), 'date': 'Today'}
+
+
+def seed(posts, rng):
+    # Goes through the normal insert triggers, so the FTS index is built as posts arrive
+    start = time.perf_counter()
+    for first in range(0, posts, CHUNK_SIZE):
+        db.session.execute(db.insert(Announcement), [post(rng) for _ in range(min(CHUNK_SIZE, posts - first))])
+        db.session.commit()
+        print(f'\r  posts: {min(first + CHUNK_SIZE, posts):,}/{posts:,}', end='', flush=True)
+    elapsed = time.perf_counter() - start
+    print(f'\r  posts: {posts:,} in {elapsed:.1f}s ({posts / elapsed:,.0f} posts/s, index built by triggers)')
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def like_filter(word):
+    return Announcement.title.contains(word) | Announcement.text.contains(word)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark FTS5 search against a LIKE scan')
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=45)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'search_bench.db')
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'METRICS_ENABLED': False})
+        init_db(app)
+        with app.app_context():
+            print(f'Seeding {args.posts:,} announcements')
+            seed(args.posts, random.Random(args.seed))
+            print(f'  database size: {os.path.getsize(path) / 1e6:,.0f} MB')
+
+            queries = [RARE[1234], 'seminar', 'midterm parking', 'office']
+            print(f'\nFirst page ({PAGE_SIZE} results), best of {args.repeat}:')
+            for q in queries:
+                match_query = build_match_query(q)
+                fts, rows = best_of(lambda: search_announcements(match_query, PAGE_SIZE, 0), args.repeat)
+
+                # What ?title= does today: LIKE on every word, newest-id order, no ranking
+                def like_page():
+                    query = Announcement.query.with_entities(Announcement.id)
+                    for word in q.split():
+                        query = query.filter(like_filter(word))
+                    return query.order_by(Announcement.id).limit(PAGE_SIZE).all()
+
+                # Ranking needs every match, so a LIKE search that ranks must read the whole table
+                def like_all():
+                    query = db.session.query(db.func.count(Announcement.id))
+                    for word in q.split():
+                        query = query.filter(like_filter(word))
+                    return query.scalar()
+
+                like, _ = best_of(like_page, args.repeat)
+                scan, matches = best_of(like_all, args.repeat)
+                print(f'  {q!r:<18} matches={matches:>9,}   fts ranked={fts * 1000:8.1f} ms   '
+                      f'like page={like * 1000:8.1f} ms   like full scan={scan * 1000:8.1f} ms   '
+                      f'speedup vs scan={scan / fts:6.1f}x')
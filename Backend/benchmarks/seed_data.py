@@ -0,0 +1,177 @@
+# Fills a database with a realistic-looking campus for load testing.
+# Run from the Backend folder, e.g. the full-size campus:
+#   python benchmarks/seed_data.py --database /tmp/campus_big.db --students 50000 --courses 2000 \
+#       --attendance 20000000 --assignments 500000 --announcements 20000
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, init_db # noqa: E402
+from hashing import hash_password # noqa: E402
+from models import db, User, Course, Attendance, Assignment, Announcement # noqa: E402
+from attendance_stats import install_attendance_triggers, rebuild_attendance_stats # noqa: E402
+from announcement_search import install_announcement_search, rebuild_announcement_search # noqa: E402
+
+# Rows per executemany + commit
+CHUNK_SIZE = 20000
+
+# Every seeded user can log in with this password
+SEED_PASSWORD = 'campus123'
+
+DEPARTMENTS = ['CS', 'MA', 'PH', 'CH', 'BI', 'EC', 'EN', 'HI', 'PS', 'ME']
+PROFESSORS = ['Dr. Smith', 'Dr. Patel', 'Dr. Garcia', 'Dr. Chen', 'Dr. Okafor', 'Dr. Novak', 'Dr. Silva', 'Dr. Kim']
+DAYS = ['M W F', 'T Th', 'M W', 'W F', 'T', 'Th']
+TERM_START = datetime(2026, 8, 31, 8, 0)
+
+# Triggers that keep derived tables in step row by row. The bulk load drops them and
+# rebuilds the attendance totals and the search index once at the end instead.
+# The change-log triggers stay: every row needs its own version for /api/sync paging.
+BULK_LOAD_TRIGGERS = [
+    'attendance_stats_after_insert', 'attendance_stats_after_update', 'attendance_stats_after_delete',
+    'announcement_fts_after_insert', 'announcement_fts_after_update', 'announcement_fts_after_delete',
+]
+
+
+def insert_chunks(model, rows, total, label, statement=None):
+    # Insert a generator of dicts in chunks, so memory stays flat for millions of rows
+    statement = statement if statement is not None else db.insert(model)
+    start = time.perf_counter()
+    chunk = []
+    done = 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            db.session.execute(statement, chunk)
+            db.session.commit()
+            done += len(chunk)
+            chunk = []
+            print(f'\r  {label}: {done:,}/{total:,}', end='', flush=True)
+    if chunk:
+        db.session.execute(statement, chunk)
+        db.session.commit()
+        done += len(chunk)
+    elapsed = time.perf_counter() - start
+    print(f'\r  {label}: {done:,} rows in {elapsed:.1f}s ({done / max(elapsed, 1e-9):,.0f} rows/s)')
+
+
+def course_codes(count):
+    return [f'{DEPARTMENTS[i % len(DEPARTMENTS)]}{100 + i // len(DEPARTMENTS)}' for i in range(count)]
+
+
+def enrolments(students, codes, rng, per_student=5):
+    # Each student takes a handful of courses; intro courses (low numbers) are more popular
+    weights = [1.0 / (1 + index // len(DEPARTMENTS)) ** 0.8 for index in range(len(codes))]
+    taken = {}
+    for user_id in range(1, students + 1):
+        taken[user_id] = list(set(rng.choices(codes, weights=weights, k=per_student)))
+    return taken
+
+
+def seed(args):
+    rng = random.Random(args.seed)
+    codes = course_codes(args.courses)
+    # With the app's configured method and cost, so logging in doesn't rehash
+    password_hash = hash_password(SEED_PASSWORD)
+
+    print(f'Seeding {args.database}')
+    for trigger in BULK_LOAD_TRIGGERS:
+        db.session.execute(db.text(f'DROP TRIGGER IF EXISTS {trigger}'))
+    db.session.commit()
+    try:
+        load(args, rng, codes, password_hash)
+    finally:
+        start = time.perf_counter()
+        pairs = rebuild_attendance_stats()
+        posts = rebuild_announcement_search()
+        install_attendance_triggers()
+        install_announcement_search()
+        print(f'  attendance totals and search index: {pairs:,} student/course pairs, '
+              f'{posts:,} posts in {time.perf_counter() - start:.1f}s')
+
+
+def load(args, rng, codes, password_hash):
+    insert_chunks(User, ({
+        'username': f'student{i}',
+        'password_hash': password_hash,
+        'role': 'Admin' if i % 1000 == 0 else 'Student'
+    } for i in range(1, args.students + 1)), args.students, 'users')
+
+    insert_chunks(Course, ({
+        'code': code,
+        'name': f'{code[:2]} Topics {code[2:]}',
+        'prof': rng.choice(PROFESSORS),
+        'room': f'{rng.choice("ABCDEFG")}{rng.randint(100, 450)}',
+        'time': f'{rng.choice(DAYS)} {rng.randint(8, 17)}:{rng.choice(["00", "30"])}'
+    } for code in codes), len(codes), 'courses')
+
+    taken = enrolments(args.students, codes, rng)
+    users = list(taken)
+
+    def attendance_rows():
+        # Students have their own habits: most attend ~85%, a few much less
+        habits = {}
+        for _ in range(args.attendance):
+            user_id = rng.choice(users)
+            if user_id not in habits:
+                habits[user_id] = rng.betavariate(8, 1.5)
+            timestamp = TERM_START + timedelta(days=rng.randint(0, 110), hours=rng.randint(0, 9))
+            yield {
+                'user_id': user_id,
+                'course_code': rng.choice(taken[user_id]),
+                'timestamp': timestamp,
+                'session_date': timestamp.date(),
+                'is_present': rng.random() < habits[user_id]
+            }
+    # One mark per student/course/day: repeated draws are skipped, so slightly fewer rows may land
+    insert_chunks(Attendance, attendance_rows(), args.attendance, 'attendance',
+                  statement=db.insert(Attendance).prefix_with('OR IGNORE'))
+
+    now = datetime.utcnow()
+    def assignment_rows():
+        for _ in range(args.assignments):
+            user_id = rng.choice(users)
+            due_date = TERM_START + timedelta(days=rng.randint(0, 120), hours=23, minutes=59)
+            # Past deadlines are usually done, future ones rarely
+            done_chance = 0.85 if due_date < now else 0.15
+            yield {
+                'user_id': user_id,
+                'course_code': rng.choice(taken[user_id]),
+                'title': f'Problem set {rng.randint(1, 12)}',
+                'description': 'Submit through the course page.',
+                'due_date': due_date,
+                'is_completed': rng.random() < done_chance
+            }
+    insert_chunks(Assignment, assignment_rows(), args.assignments, 'assignments')
+
+    insert_chunks(Announcement, ({
+        'title': f'{rng.choice(codes)}: {rng.choice(["Room change", "Quiz moved", "Office hours", "Lab cancelled"])}',
+        'text': 'Please check the updated schedule on the notice board. ' * rng.randint(1, 6),
+        'date': (TERM_START + timedelta(days=i * 120 // max(args.announcements, 1))).strftime('%Y-%m-%d')
+    } for i in range(args.announcements)), args.announcements, 'announcements')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic campus data')
+    parser.add_argument('--database', required=True, help='SQLite file to create (must not exist)')
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--courses', type=int, default=200)
+    parser.add_argument('--attendance', type=int, default=200000)
+    parser.add_argument('--assignments', type=int, default=50000)
+    parser.add_argument('--announcements', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=45)
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.database)
+    if os.path.exists(path):
+        sys.exit(f'{path} already exists; pick a new file so real data is never touched.')
+    args.database = path
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'METRICS_ENABLED': False})
+    init_db(app)
+    with app.app_context():
+        seed(args)
@@ -0,0 +1,68 @@
+# Compares the old list path (ORM objects + to_dict + jsonify) with serializers.py
+# (column tuples + fast JSON) for every model.
+# Run from the Backend folder:  python benchmarks/serialization.py --rows 10000
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Use a throwaway in-memory database instead of campus_data.db
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ.setdefault('CAMPUS_DB_PROFILE', 'development')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify # noqa: E402
+from app import create_app, init_db # noqa: E402
+from models import db, Announcement, Course, Attendance, Assignment # noqa: E402
+from serializers import select_rows, rows_to_dicts, json_response, orjson # noqa: E402
+
+
+def seed(rows):
+    start = datetime(2026, 1, 1)
+    db.session.execute(db.insert(Announcement), [
+        {'title': f'Notice {i}', 'text': 'Lecture moved to the main hall. ' * 4, 'date': 'Today'} for i in range(rows)])
+    db.session.execute(db.insert(Course), [
+        {'code': f'C{i}', 'name': f'Course {i}', 'prof': 'Dr. Smith', 'room': 'B305', 'time': 'M W F 11:00'} for i in range(rows)])
+    # One mark per student/course/day (the unique index): the class day is the mark's own day
+    db.session.execute(db.insert(Attendance), [
+        {'user_id': i % 300 + 1, 'course_code': f'C{i % 40}', 'timestamp': start + timedelta(hours=i),
+         'session_date': (start + timedelta(hours=i)).date(), 'is_present': i % 4 != 0}
+        for i in range(rows)])
+    db.session.execute(db.insert(Assignment), [
+        {'user_id': i % 300 + 1, 'course_code': f'C{i % 40}', 'title': f'Task {i}', 'description': 'Read chapter 3',
+         'due_date': start + timedelta(days=i % 400), 'is_completed': i % 3 == 0} for i in range(rows)])
+    db.session.commit()
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark to_dict vs the column-tuple serializer')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    init_db(app)
+    with app.test_request_context():
+        seed(args.rows)
+        print(f"{args.rows} rows per model, JSON encoder: {'orjson' if orjson else 'json'}")
+        for model in (Announcement, Course, Attendance, Assignment):
+            def old_path():
+                db.session.expunge_all()
+                return jsonify([row.to_dict() for row in model.query.all()]).get_data()
+
+            def fast_path():
+                return json_response(rows_to_dicts(model, select_rows(model).all())).get_data()
+
+            old = best_of(old_path, args.repeat)
+            fast = best_of(fast_path, args.repeat)
+            print(f"{model.__name__:<13} to_dict={old * 1000:8.1f} ms   fast={fast * 1000:8.1f} ms   speedup={old / fast:5.2f}x")
@@ -0,0 +1,92 @@
+# Concurrent read/write benchmark for the SQLite storage profiles in storage.py
+# Run from the Backend folder:  python benchmarks/sqlite_profiles.py --seconds 5 --readers 8
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage import STORAGE_PROFILES, install_pragmas # noqa: E402
+
+
+def make_engine(path, profile):
+    settings = STORAGE_PROFILES[profile]
+    engine = create_engine(f'sqlite:///{path}', **settings['engine_options'])
+    install_pragmas(engine, settings['pragmas'])
+    return engine
+
+
+def setup(engine, rows):
+    # A small attendance table with the summary index, pre-filled with some history
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE attendance (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, '
+                          'course_code VARCHAR(10) NOT NULL, timestamp DATETIME, is_present BOOLEAN NOT NULL)'))
+        conn.execute(text('CREATE INDEX ix_attendance_user_course_present ON attendance (user_id, course_code, is_present)'))
+        conn.execute(text('INSERT INTO attendance (user_id, course_code, is_present) VALUES (:u, :c, :p)'),
+                     [{'u': i % 500, 'c': f'CS{i % 20}', 'p': i % 3 != 0} for i in range(rows)])
+
+
+def run(profile, seconds, readers, rows):
+    folder = tempfile.mkdtemp()
+    engine = make_engine(os.path.join(folder, 'bench.db'), profile)
+    setup(engine, rows)
+
+    counts = {'reads': 0, 'writes': 0, 'locked': 0}
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def reader(n):
+        done = 0
+        while time.perf_counter() < stop:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text('SELECT course_code, SUM(is_present), COUNT(id) FROM attendance '
+                                      'WHERE user_id = :u GROUP BY course_code'), {'u': done % 500}).all()
+                done += 1
+            except OperationalError:
+                with lock:
+                    counts['locked'] += 1
+        with lock:
+            counts['reads'] += done
+
+    def writer():
+        done = 0
+        while time.perf_counter() < stop:
+            try:
+                # One commit per row, like /api/attendance/mark
+                with engine.begin() as conn:
+                    conn.execute(text('INSERT INTO attendance (user_id, course_code, is_present) VALUES (:u, :c, 1)'),
+                                 {'u': done % 500, 'c': 'CS1'})
+                done += 1
+            except OperationalError:
+                with lock:
+                    counts['locked'] += 1
+        with lock:
+            counts['writes'] += done
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    print(f"{profile:<12} reads/s={counts['reads'] / seconds:>10.1f}  "
+          f"writes/s={counts['writes'] / seconds:>8.1f}  locked errors={counts['locked']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare SQLite storage profiles under concurrent load')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    for name in STORAGE_PROFILES:
+        run(name, args.seconds, args.readers, args.rows)
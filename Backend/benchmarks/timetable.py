@@ -0,0 +1,88 @@
+# Times the timetable clash checks in timetable.py on a large synthetic catalog:
+# the whole-catalog sweep, and one course checked through the interval index versus
+# comparing it with every other course.
+# Run from the Backend folder:  python benchmarks/timetable.py --sections 50000
+import argparse
+import os
+import random
+import sys
+import time
+
+# Use a throwaway in-memory database instead of campus_data.db
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ.setdefault('CAMPUS_DB_PROFILE', 'development')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, init_db # noqa: E402
+from models import db, Course # noqa: E402
+from timetable import TimetableIndex, find_conflicts, parse_time_slot, resource_keys # noqa: E402
+
+DAYS = ['M W F', 'T Th', 'M W', 'W F', 'T', 'Th', 'F']
+
+
+def sections(count, rng):
+    # About 40 meetings a week per room, so some clashes happen by chance
+    rooms = max(1, count // 12)
+    professors = max(1, count // 4)
+    for i in range(count):
+        start = rng.randint(8, 19) * 60 + rng.choice([0, 30])
+        length = rng.choice([50, 75, 110])
+        end = start + length
+        yield {
+            'code': f'S{i}',
+            'name': f'Section {i}',
+            'room': f'R{rng.randrange(rooms)}',
+            'prof': f'Prof {rng.randrange(professors)}',
+            'time': f'{rng.choice(DAYS)} {start // 60}:{start % 60:02d}-{end // 60}:{end % 60:02d}'
+        }
+
+
+def linear_check(rows, room, prof, intervals):
+    # What a check costs without an index: look at every course
+    keys = set(resource_keys(room, prof))
+    clashes = 0
+    for _, _, other_room, other_prof, other_time in rows:
+        if keys & set(resource_keys(other_room, other_prof)):
+            for start, end in parse_time_slot(other_time):
+                clashes += sum(1 for s, e in intervals if s < end and start < e)
+    return clashes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the timetable clash checks')
+    parser.add_argument('--sections', type=int, default=50000)
+    parser.add_argument('--checks', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=45)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    app = create_app()
+    init_db(app)
+    with app.app_context():
+        db.session.execute(db.insert(Course), list(sections(args.sections, rng)))
+        db.session.commit()
+        rows = db.session.query(Course.id, Course.code, Course.room, Course.prof, Course.time).all()
+
+        start = time.perf_counter()
+        report = find_conflicts(rows)
+        sweep = time.perf_counter() - start
+        print(f"{args.sections:,} sections: whole-catalog check {sweep * 1000:.0f} ms, "
+              f"{len(report['conflicts']):,} clashing pairs")
+
+        index = TimetableIndex()
+        start = time.perf_counter()
+        index.check(None, None, None, ())
+        print(f"  first index load (every course): {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        probes = [next(sections(1, rng)) for _ in range(args.checks)]
+        start = time.perf_counter()
+        for probe in probes:
+            index.check(None, probe['room'], probe['prof'], parse_time_slot(probe['time']))
+        indexed = (time.perf_counter() - start) / args.checks
+
+        start = time.perf_counter()
+        for probe in probes[:10]:
+            linear_check(rows, probe['room'], probe['prof'], parse_time_slot(probe['time']))
+        linear = (time.perf_counter() - start) / 10
+        print(f"  one course, interval index: {indexed * 1000:.2f} ms (includes the change-log catch-up)")
+        print(f"  one course, compared with every course: {linear * 1000:.1f} ms   speedup={linear / indexed:.0f}x")
@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from flask import request, make_response
+from change_log import table_versions
+
+# --- 1. THE CACHE ---
+
+# Stores finished JSON responses (raw bytes + headers + compressed forms) for read-heavy GET routes.
+# Every key contains the tables' newest change numbers, read from the database (see
+# change_log.table_versions), so a write by any server process makes all old entries
+# unreachable; the LRU then pushes them out. An answer that also depends on the clock
+# can be given an expiry time as well.
+#
+# The change numbers are read at most once per `version_seconds` per set of tables, so a
+# hit within that time is a dictionary lookup with no SQL. The trade-off: another process's
+# write can take up to `version_seconds` to show. This process's own writes forget the
+# numbers straight away (see init_cache), so a client always reads its own writes.
+class ResponseCache:
+    def __init__(self, max_entries=512, version_seconds=1.0):
+        self.max_entries = max_entries
+        self.version_seconds = version_seconds
+        self._entries = OrderedDict()
+        self._versions = {} # tables -> (monotonic time read, change numbers)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.version_reads = 0
+
+    def versions(self, tables):
+        # The tables' change numbers, from the database when the last read is too old
+        now = time.monotonic()
+        with self._lock:
+            read_at, versions = self._versions.get(tables, (None, None))
+        if read_at is not None and now - read_at < self.version_seconds:
+            return versions
+        versions = table_versions(tables)
+        with self._lock:
+            # One entry per table set (per user for 'assignment:7'); start over rather than grow
+            if len(self._versions) >= self.max_entries:
+                self._versions.clear()
+            self._versions[tables] = (now, versions)
+            self.version_reads += 1
+        return versions
+
+    def forget_versions(self):
+        with self._lock:
+            self._versions.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and datetime.utcnow() >= entry[1]:
+                # Expired: the answer would be different now even though no table changed
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            # Mark as most recently used
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, entry, expires_at=None):
+        # expires_at: UTC datetime after which the entry is no longer served (None = never)
+        with self._lock:
+            self._entries[key] = (entry, expires_at)
+            self._entries.move_to_end(key)
+            # Drop the least recently used entries once we are over the limit
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'version_reads': self.version_reads
+            }
+
+
+# The shared cache used by the blueprints
+response_cache = ResponseCache()
+
+
+def init_cache(app):
+    response_cache.max_entries = app.config['RESPONSE_CACHE_SIZE']
+    response_cache.version_seconds = app.config['RESPONSE_CACHE_VERSION_SECONDS']
+
+    @app.after_request
+    def forget_versions_after_write(response):
+        # A write in this process: read the change numbers again on the next GET
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            response_cache.forget_versions()
+        return response
+
+
+# --- 2. DECORATOR FOR ROUTES ---
+
+# Headers we keep with the cached body (Content-Length is recomputed by Flask)
+CACHED_HEADERS = ('Content-Type', 'ETag', 'X-Next-Cursor')
+
+def cached_get(*tables):
+    # Serve GET requests for this route from the cache; other methods pass straight through.
+    # A table name can use the route's arguments, e.g. 'assignment:{user_id}', for per-user versions.
+    # Costs at most one SQL statement per GET (the change numbers, see ResponseCache.versions).
+    # A view whose answer changes with time sets response.cache_expires_at (UTC) to limit it.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            versions = response_cache.versions(tuple(table.format(**kwargs) for table in tables))
+            key = (tables, versions, request.full_path)
+            entry = response_cache.get(key)
+
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                # Only cache normal successful answers (not 304s or errors)
+                if response.status_code == 200 and not response.is_streamed:
+                    headers = [(name, response.headers[name]) for name in CACHED_HEADERS if name in response.headers]
+                    variants = {}
+                    response_cache.put(key, (response.get_data(), headers, variants),
+                                       getattr(response, 'cache_expires_at', None))
+                    # The compression hook stores the gzip/brotli forms here (see compression.py)
+                    response.compressed_variants = variants
+                return response
+
+            body, headers, variants = entry
+            response = make_response(body, 200, headers)
+            response.compressed_variants = variants
+            # Answer conditional GETs from the cache too
+            etag, _ = response.get_etag()
+            if etag and request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from models import db
+
+# --- 1. TRIGGERS THAT NUMBER EVERY CHANGE ---
+
+# Every insert, update and delete on a synced table takes the next number from change_seq.
+# Inserts and updates stamp it on the row (version, updated_at); deletes leave a tombstone.
+# SQLite runs the triggers in the same transaction as the write, so every write path
+# (ORM, attendance upserts, bulk marks, the seeder) is numbered the same way, and a
+# client can ask /api/sync for everything after the last number it saw.
+
+# Synced tables, and the column that says whose row it is (None = shared by everyone)
+SYNCED_TABLES = {
+    'announcement': None,
+    'course': None,
+    'assignment': 'user_id',
+    'attendance': 'user_id',
+}
+
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+NEXT_SEQ = 'UPDATE change_seq SET value = value + 1 WHERE id = 1;'
+CURRENT_SEQ = '(SELECT value FROM change_seq WHERE id = 1)'
+PRUNED_SEQ = '(SELECT pruned_seq FROM change_seq WHERE id = 1)'
+
+
+def change_triggers(table, owner):
+    stamp = f'UPDATE {table} SET version = {CURRENT_SEQ}, updated_at = {NOW} WHERE id = NEW.id;'
+    owner_value = f'OLD.{owner}' if owner else 'NULL'
+    return [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_change_after_insert AFTER INSERT ON {table}
+        BEGIN
+            {NEXT_SEQ}
+            {stamp}
+        END
+        ''',
+        # The WHEN clause skips the trigger's own stamping update
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_change_after_update AFTER UPDATE ON {table}
+        WHEN NEW.version = OLD.version
+        BEGIN
+            {NEXT_SEQ}
+            {stamp}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_change_after_delete AFTER DELETE ON {table}
+        BEGIN
+            {NEXT_SEQ}
+            INSERT INTO tombstone (seq, table_name, row_id, user_id, deleted_at)
+            VALUES ({CURRENT_SEQ}, '{table}', OLD.id, {owner_value}, {NOW});
+        END
+        ''',
+    ]
+
+
+def install_change_triggers():
+    db.session.execute(text('INSERT OR IGNORE INTO change_seq (id, value) VALUES (1, 0)'))
+    for table, owner in SYNCED_TABLES.items():
+        for statement in change_triggers(table, owner):
+            db.session.execute(text(statement))
+    db.session.commit()
+
+
+# --- 2. UPGRADING OLDER TABLES ---
+
+def upgrade_change_columns():
+    # Databases made before delta sync lack the version/updated_at columns. Number the
+    # existing rows as if each had just been written, so a client syncing from 0 still
+    # receives them. Versions must be unique within a table, because /api/sync pages by them.
+    db.session.execute(text('INSERT OR IGNORE INTO change_seq (id, value) VALUES (1, 0)'))
+    upgraded = False
+    for table in SYNCED_TABLES:
+        columns = [row[1] for row in db.session.execute(text(f'PRAGMA table_info({table})'))]
+        if 'version' in columns:
+            continue
+        db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 0'))
+        db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN updated_at DATETIME'))
+        db.session.execute(text(f'UPDATE {table} SET version = id + {CURRENT_SEQ}'))
+        db.session.execute(text(
+            f'UPDATE change_seq SET value = value + (SELECT COALESCE(MAX(id), 0) FROM {table}) WHERE id = 1'
+        ))
+        upgraded = True
+    columns = [row[1] for row in db.session.execute(text('PRAGMA table_info(change_seq)'))]
+    if 'pruned_seq' not in columns:
+        db.session.execute(text('ALTER TABLE change_seq ADD COLUMN pruned_seq INTEGER NOT NULL DEFAULT 0'))
+        upgraded = True
+    db.session.commit()
+    return upgraded
+
+
+def current_seq():
+    return db.session.execute(text(f'SELECT {CURRENT_SEQ}')).scalar() or 0
+
+
+def change_horizon():
+    # (latest change number, newest pruned tombstone number) in one statement
+    row = db.session.execute(text('SELECT value, pruned_seq FROM change_seq WHERE id = 1')).first()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+# --- 3. PRUNING OLD TOMBSTONES ---
+
+def prune_tombstones(days):
+    # Delete the tombstones older than `days` days and remember the newest pruned number.
+    # A client whose last sync is older than that may have missed a delete, so /api/sync
+    # tells it to start again from 0 (and /api/stream sends a reset). Returns (deleted, horizon).
+    cutoff = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%f')
+    newest = db.session.execute(
+        text('SELECT MAX(seq) FROM tombstone WHERE deleted_at < :cutoff'), {'cutoff': cutoff}
+    ).scalar()
+    deleted = 0
+    if newest is not None:
+        # Numbers grow with time, so everything up to the newest old tombstone goes (a delete
+        # committed meanwhile gets a bigger number and is kept)
+        deleted = db.session.execute(text('DELETE FROM tombstone WHERE seq <= :seq'), {'seq': newest}).rowcount
+        db.session.execute(text('UPDATE change_seq SET pruned_seq = MAX(pruned_seq, :seq) WHERE id = 1'),
+                           {'seq': newest})
+    horizon = change_horizon()[1]
+    db.session.commit()
+    return deleted, horizon
+
+
+# --- 4. HOW NEW A TABLE'S DATA IS (for the response cache) ---
+
+# Writes that skip the triggers but still change what readers see: archiving a term
+# moves marks out of attendance without tombstones (see archive.py)
+UNLOGGED_CHANGES = {
+    'attendance': 'SELECT COUNT(*) FROM archived_term',
+}
+
+
+def table_versions(tables):
+    # The newest change number of each table, or of one owner's rows ('assignment:7'), in one
+    # statement. Row versions and tombstones both come from change_seq, so the number grows
+    # with every insert, update and delete, whichever server process made it.
+    columns = []
+    params = {}
+    for index, spec in enumerate(tables):
+        table, _, owner_id = spec.partition(':')
+        owner = SYNCED_TABLES[table]
+        if owner_id:
+            params[f'owner_{index}'] = int(owner_id)
+            rows = f'SELECT MAX(version) FROM {table} WHERE {owner} = :owner_{index}'
+            deletes = f"SELECT MAX(seq) FROM tombstone WHERE table_name = '{table}' AND user_id = :owner_{index}"
+        else:
+            rows = f'SELECT MAX(version) FROM {table}'
+            deletes = f"SELECT MAX(seq) FROM tombstone WHERE table_name = '{table}' AND user_id IS NULL"
+        # With the pruning horizon, so pruning a table's newest tombstone never takes its
+        # number back to one an older cached answer was stored under
+        columns.append(f'MAX(COALESCE(({rows}), 0), COALESCE(({deletes}), 0), {PRUNED_SEQ})')
+        if table in UNLOGGED_CHANGES:
+            columns.append(f'({UNLOGGED_CHANGES[table]})')
+    return tuple(db.session.execute(text('SELECT ' + ', '.join(columns)), params).one())
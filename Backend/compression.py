@@ -0,0 +1,122 @@
+import zlib
+from flask import request
+
+# brotli is optional; without it we only offer gzip and deflate
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# --- 1. SETTINGS ---
+
+# Bodies smaller than this are sent as-is (compressing them isn't worth the CPU)
+DEFAULT_MIN_SIZE = 500
+DEFAULT_LEVEL = 6
+
+# Only text-like payloads compress well
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+# Long-lived streams: compressors buffer output, which would hold events back
+NEVER_COMPRESS = ('text/event-stream',)
+
+
+def supported_encodings():
+    # In order of preference when the client accepts several equally
+    return (['br'] if brotli is not None else []) + ['gzip', 'deflate']
+
+
+# --- 2. COMPRESSORS ---
+
+class StreamCompressor:
+    # Compresses a body piece by piece, flushing after each piece so streams keep flowing
+    def __init__(self, encoding, level):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=min(level, 11))
+        else:
+            # wbits 31 writes a gzip header, 15 writes the zlib format HTTP calls "deflate"
+            self._zlib = zlib.compressobj(level, zlib.DEFLATED, 31 if encoding == 'gzip' else 15)
+
+    def compress(self, data):
+        if self.encoding == 'br':
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+def compress_bytes(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level, 11))
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31 if encoding == 'gzip' else 15)
+    return compressor.compress(data) + compressor.flush()
+
+def compress_stream(chunks, encoding, level):
+    compressor = StreamCompressor(encoding, level)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        if chunk:
+            yield compressor.compress(chunk)
+    yield compressor.finish()
+
+
+# --- 3. HOOKING IT INTO THE APP ---
+
+def init_compression(app):
+    app.config.setdefault('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE)
+    app.config.setdefault('COMPRESS_LEVEL', DEFAULT_LEVEL)
+
+    @app.after_request
+    def compress_response(response):
+        # Let caches know the body depends on Accept-Encoding
+        response.vary.add('Accept-Encoding')
+
+        if response.status_code == 304:
+            # Answer with the ETag as the client has it: weak if it got a compressed body
+            etag, weak = response.get_etag()
+            if etag and not weak and not request.if_none_match.contains(etag):
+                response.set_etag(etag, weak=True)
+            return response
+
+        if (response.status_code < 200 or response.status_code >= 300 or response.status_code == 204
+                or request.method == 'HEAD'
+                or 'Content-Encoding' in response.headers
+                or not (response.mimetype or '').startswith(COMPRESSIBLE_TYPES)
+                or response.mimetype in NEVER_COMPRESS):
+            return response
+
+        encoding = request.accept_encodings.best_match(supported_encodings())
+        if encoding is None:
+            return response
+        level = app.config['COMPRESS_LEVEL']
+
+        if response.is_streamed:
+            # Exports: compress each chunk as the generator produces it
+            response.response = compress_stream(response.response, encoding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < app.config['COMPRESS_MIN_SIZE']:
+                return response
+
+            # Cached responses carry a dict for their compressed forms (see cache.py),
+            # so each encoding is only compressed once per cache entry
+            variants = getattr(response, 'compressed_variants', None)
+            if variants is not None and encoding in variants:
+                compressed = variants[encoding]
+            else:
+                compressed = compress_bytes(body, encoding, level)
+                if variants is not None:
+                    variants[encoding] = compressed
+            response.set_data(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        # The bytes differ per encoding, so the routes' strong ETag would claim the gzip
+        # and the plain body are identical. Sent weak, it still answers If-None-Match.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,146 @@
+import json
+import threading
+from collections import deque
+from models import db, Announcement, Course, Tombstone
+from change_log import change_horizon
+
+# --- The /api/stream change feed, read from the shared change log ---
+
+# Topic -> model. Every write, from any server process, stamps the row with the next
+# change_seq number (or leaves a tombstone), so that number is the event id: it means
+# the same thing on every worker, and a reconnect can resume on any of them.
+TOPIC_MODELS = {'announcements': Announcement, 'courses': Course}
+
+
+def read_changes(since, until, limit=None, newest_ids=None):
+    # The feed events for changes with since < seq <= until, oldest first, as
+    # (seq, topic, event, json data). A row changed several times shows up once, as it is now.
+    # newest_ids ({topic: highest id seen}) tells a new row ('created') from an edited one;
+    # without it every row is sent as 'updated'.
+    events = []
+    for topic, model in TOPIC_MODELS.items():
+        rows = model.query.filter(model.version > since, model.version <= until).order_by(model.version)
+        for row in (rows.limit(limit) if limit else rows):
+            created = newest_ids is not None and row.id > newest_ids[topic]
+            if created:
+                newest_ids[topic] = row.id
+            events.append((row.version, topic, 'created' if created else 'updated', json.dumps(row.to_dict())))
+
+    topics = {model.__tablename__: topic for topic, model in TOPIC_MODELS.items()}
+    deletes = db.session.query(Tombstone.seq, Tombstone.table_name, Tombstone.row_id) \
+        .filter(Tombstone.seq > since, Tombstone.seq <= until, Tombstone.table_name.in_(topics)) \
+        .order_by(Tombstone.seq)
+    for seq, table_name, row_id in (deletes.limit(limit) if limit else deletes):
+        events.append((seq, topics[table_name], 'deleted', json.dumps({'id': row_id})))
+    return sorted(events)
+
+
+class ChangeFeed:
+    # One poller thread per server process reads the change log every `interval` seconds
+    # while someone listens (one cheap SELECT when nothing changed), keeps the last
+    # `history` events in a ring buffer and wakes the waiting streams. The streams
+    # themselves never touch the database, so an idle listener costs no queries.
+    def __init__(self, app, interval=1.0, history=1000):
+        self.app = app
+        self.interval = interval
+        self.history = history
+        self._condition = threading.Condition()
+        self._events = deque()
+        self._listeners = 0
+        self._thread = None
+        self.start_seq = 0 # Buffered events cover changes after this number
+        self.last_id = 0   # Newest change number read
+        self._dropped = 0  # Newest event id pushed out of the buffer
+        self.pruned_seq = 0 # Deletes up to this number are no longer in the change log
+
+    def subscribe(self, limit):
+        # Count a new listener (False when `limit` are already listening), starting the poller
+        with self._condition:
+            if self._listeners >= limit:
+                return False
+            self._listeners += 1
+            if self._thread is None:
+                ready = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(ready,), name='change-feed', daemon=True)
+                self._thread.start()
+            else:
+                ready = None
+        if ready is not None:
+            ready.wait()
+        return True
+
+    def unsubscribe(self):
+        with self._condition:
+            self._listeners -= 1
+            self._condition.notify_all()
+
+    @property
+    def listeners(self):
+        return self._listeners
+
+    def _run(self, ready):
+        with self.app.app_context():
+            try:
+                first, pruned = change_horizon()
+                newest_ids = {topic: db.session.query(db.func.max(model.id)).scalar() or 0
+                              for topic, model in TOPIC_MODELS.items()}
+                db.session.rollback()
+                with self._condition:
+                    self._events.clear()
+                    self.start_seq = self.last_id = self._dropped = first
+                    self.pruned_seq = pruned
+            finally:
+                ready.set()
+
+            while True:
+                with self._condition:
+                    # Stop once the last listener has left; the next one starts a fresh poller
+                    if self._listeners == 0:
+                        self._thread = None
+                        return
+                    self._condition.wait_for(lambda: self._listeners == 0, self.interval)
+                try:
+                    self._poll(newest_ids)
+                except Exception:
+                    self.app.logger.exception('Reading the change log for /api/stream failed')
+                finally:
+                    # End the read transaction, so the next poll sees newer commits
+                    db.session.rollback()
+
+    def _poll(self, newest_ids):
+        latest, self.pruned_seq = change_horizon()
+        if latest <= self.last_id:
+            return
+        events = read_changes(self.last_id, latest, newest_ids=newest_ids)
+        with self._condition:
+            for event in events:
+                if len(self._events) == self.history:
+                    self._dropped = self._events.popleft()[0]
+                self._events.append(event)
+            self.last_id = latest
+            self._condition.notify_all()
+
+    def since(self, last_id, topics):
+        # Buffered events after last_id for these topics, whether some of them were already
+        # dropped from the buffer (or last_id is from a newer database), meaning the client
+        # must refetch, and the newest id read so the caller can skip past other topics' events
+        with self._condition:
+            missed = last_id > self.last_id or last_id < self._dropped
+            events = [e for e in self._events if e[0] > last_id and e[1] in topics]
+            return events, missed, self.last_id
+
+    def wait(self, last_id, timeout):
+        # Sleep until a change newer than last_id is read (or the timeout passes)
+        with self._condition:
+            return self._condition.wait_for(lambda: self.last_id > last_id, timeout)
+
+
+_feeds_lock = threading.Lock()
+
+def change_feed(app):
+    # The feed of this app in this server process
+    with _feeds_lock:
+        if 'change_feed' not in app.extensions:
+            app.extensions['change_feed'] = ChangeFeed(app, app.config['STREAM_POLL_SECONDS'],
+                                                       app.config['STREAM_HISTORY'])
+        return app.extensions['change_feed']
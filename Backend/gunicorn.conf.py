@@ -0,0 +1,47 @@
+# Gunicorn settings for Campus Companion (run from the Backend folder):
+#   flask --app app init-db
+#   gunicorn -c gunicorn.conf.py wsgi:app
+import os
+import time
+
+# --- 1. WORKERS ---
+
+bind = os.environ.get('CAMPUS_BIND', '0.0.0.0:8000')
+# Separate processes, so requests run on every core
+workers = int(os.environ.get('CAMPUS_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+# Threads per worker; requests mostly wait on SQLite, so a few threads per process help
+worker_class = os.environ.get('CAMPUS_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('CAMPUS_THREADS', 4))
+# For CAMPUS_WORKER_CLASS=gevent (pip install gevent): open connections per worker. Use it
+# for a separate server that only takes /api/stream, where almost every connection is idle.
+worker_connections = int(os.environ.get('CAMPUS_WORKER_CONNECTIONS', 1000))
+# Import the app once in the master and fork it, instead of once per worker
+preload_app = os.environ.get('CAMPUS_PRELOAD', '1') == '1'
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+# Restart workers now and then so memory can't creep up forever
+max_requests = 10000
+max_requests_jitter = 1000
+
+
+# --- 2. STARTUP TIMING ---
+
+# Gunicorn reads this file before it imports the app, so this is the master's start time
+_started = {'master': time.perf_counter()}
+
+def when_ready(server):
+    server.log.info('App loaded in master after %.1f ms (preload=%s)',
+                    (time.perf_counter() - _started['master']) * 1000, preload_app)
+
+def post_fork(server, worker):
+    # Don't share pooled SQLite connections opened before the fork
+    app = server.app.wsgi() if preload_app else None
+    if app is not None:
+        from models import db
+        with app.app_context():
+            db.engine.dispose(close=False)
+
+def post_worker_init(worker):
+    worker.log.info('Worker %s ready %.1f ms after master start', worker.pid,
+                    (time.perf_counter() - _started['master']) * 1000)
@@ -0,0 +1,128 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# --- 1. SETTINGS ---
+
+# Hash algorithm and cost in werkzeug's format, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+# The pool of hashing processes (created on first use) and its settings
+_settings = {
+    'method': DEFAULT_METHOD,
+    'workers': 1,                     # Per server process; 0 hashes inline in the request thread (handy for debugging)
+    'queue_limit': 64,                # Most hashes allowed to wait or run at the same time
+    'queue_timeout': 10,              # Seconds to wait for a free slot before giving up
+}
+_pool = None
+_pool_lock = threading.Lock()
+# The method as werkzeug writes it into a hash, per configured method (see needs_rehash)
+_stored_methods = {}
+_slots = threading.BoundedSemaphore(_settings['queue_limit'])
+
+
+class HashingBusy(Exception):
+    # Raised when too many hashes are already queued
+    pass
+
+
+def configure_hashing(method=None, workers=None, queue_limit=None, queue_timeout=None):
+    global _pool, _slots
+    with _pool_lock:
+        if method is not None:
+            _settings['method'] = method
+        if workers is not None:
+            _settings['workers'] = workers
+        if queue_timeout is not None:
+            _settings['queue_timeout'] = queue_timeout
+        if queue_limit is not None:
+            _settings['queue_limit'] = queue_limit
+            _slots = threading.BoundedSemaphore(queue_limit)
+        # Start a fresh pool next time with the new settings
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_settings['workers'])
+        return _pool
+
+
+# --- 2. METRICS ---
+
+_metrics = {
+    'hashes': 0,
+    'checks': 0,
+    'rejected': 0,
+    'queue_depth': 0,
+    'max_queue_depth': 0,
+    'total_seconds': 0.0,
+    'max_seconds': 0.0,
+}
+_metrics_lock = threading.Lock()
+
+
+def hashing_stats():
+    with _metrics_lock:
+        stats = dict(_metrics)
+    calls = stats['hashes'] + stats['checks']
+    stats['avg_seconds'] = stats['total_seconds'] / calls if calls else 0.0
+    stats['method'] = _settings['method']
+    stats['workers'] = _settings['workers']
+    return stats
+
+
+# --- 3. RUNNING A HASH ---
+
+def _run(kind, func, *args):
+    # Wait for a free slot so a login burst can't queue unlimited work
+    slots = _slots
+    if not slots.acquire(timeout=_settings['queue_timeout']):
+        with _metrics_lock:
+            _metrics['rejected'] += 1
+        raise HashingBusy('Password hashing queue is full')
+
+    with _metrics_lock:
+        _metrics['queue_depth'] += 1
+        _metrics['max_queue_depth'] = max(_metrics['max_queue_depth'], _metrics['queue_depth'])
+
+    start = time.perf_counter()
+    try:
+        if _settings['workers'] > 0:
+            # The hash runs in another process, so this thread just waits without holding the GIL
+            return _get_pool().submit(func, *args).result()
+        return func(*args)
+    finally:
+        elapsed = time.perf_counter() - start
+        slots.release()
+        with _metrics_lock:
+            _metrics['queue_depth'] -= 1
+            _metrics[kind] += 1
+            _metrics['total_seconds'] += elapsed
+            _metrics['max_seconds'] = max(_metrics['max_seconds'], elapsed)
+
+
+def hash_password(password):
+    return _run('hashes', generate_password_hash, password, _settings['method'])
+
+
+def verify_password(password_hash, password):
+    return _run('checks', check_password_hash, password_hash, password)
+
+
+def _stored_method(method):
+    # werkzeug fills in defaults when it writes the method ('scrypt' is stored as
+    # 'scrypt:32768:8:1'), so hash a dummy value once to learn the stored form
+    if method not in _stored_methods:
+        _stored_methods[method] = generate_password_hash('', method).split('$', 1)[0]
+    return _stored_methods[method]
+
+
+def needs_rehash(password_hash):
+    # werkzeug stores hashes as 'method$salt$hash'; rehash when the method or cost changed
+    return password_hash.split('$', 1)[0] != _stored_method(_settings['method'])
@@ -0,0 +1,203 @@
+import random
+import threading
+import time
+from flask import request, current_app
+from sqlalchemy import event
+from models import db
+from cache import response_cache
+from hashing import hashing_stats
+
+# --- 1. SETTINGS ---
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+DEFAULT_SETTINGS = {
+    'METRICS_ENABLED': True,
+    'METRICS_SAMPLE_RATE': 1.0,          # Share of requests measured normally
+    'METRICS_LOAD_THRESHOLD': 64,        # Requests in flight (per process) that count as "under load"
+    'METRICS_LOAD_SAMPLE_RATE': 0.1,     # Share of requests measured while under load
+    'SLOW_QUERY_SECONDS': 0.25,          # Statements slower than this are logged with their SQL
+}
+
+# Where the measurements of the current request live (one dict per request, also for batch sub-requests)
+ENVIRON_KEY = 'campus.metrics'
+
+
+# --- 2. THE NUMBERS WE KEEP ---
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        self.in_flight = 0
+        self.slow_queries = 0
+
+    def _endpoint(self, name):
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = {
+                'buckets': [0] * len(LATENCY_BUCKETS),
+                'count': 0,
+                'seconds': 0.0,
+                'sql_statements': 0,
+                'sql_seconds': 0.0,
+                'response_bytes': 0,
+            }
+            self.endpoints[name] = stats
+        return stats
+
+    def record(self, name, seconds, sql_statements, sql_seconds, response_bytes):
+        with self._lock:
+            stats = self._endpoint(name)
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats['buckets'][index] += 1
+                    break
+            stats['count'] += 1
+            stats['seconds'] += seconds
+            stats['sql_statements'] += sql_statements
+            stats['sql_seconds'] += sql_seconds
+            stats['response_bytes'] += response_bytes
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+            return self.in_flight
+
+    def finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(stats, buckets=list(stats['buckets'])) for name, stats in self.endpoints.items()}
+
+
+request_metrics = RequestMetrics()
+
+
+# --- 3. PROMETHEUS TEXT FORMAT ---
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+def render_prometheus():
+    lines = []
+    endpoints = request_metrics.snapshot()
+
+    lines.append('# HELP campus_request_duration_seconds Request latency per endpoint.')
+    lines.append('# TYPE campus_request_duration_seconds histogram')
+    for name, stats in sorted(endpoints.items()):
+        label = _label(name)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, stats['buckets']):
+            cumulative += count
+            lines.append(f'campus_request_duration_seconds_bucket{{endpoint="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'campus_request_duration_seconds_bucket{{endpoint="{label}",le="+Inf"}} {stats["count"]}')
+        lines.append(f'campus_request_duration_seconds_sum{{endpoint="{label}"}} {stats["seconds"]:.6f}')
+        lines.append(f'campus_request_duration_seconds_count{{endpoint="{label}"}} {stats["count"]}')
+
+    counters = [
+        ('campus_request_sql_statements_total', 'SQL statements run by measured requests.', 'sql_statements', '{}'),
+        ('campus_request_sql_seconds_total', 'Time spent in SQL by measured requests.', 'sql_seconds', '{:.6f}'),
+        ('campus_response_bytes_total', 'Response body bytes sent by measured requests.', 'response_bytes', '{}'),
+    ]
+    for metric, help_text, key, fmt in counters:
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} counter')
+        for name, stats in sorted(endpoints.items()):
+            lines.append(f'{metric}{{endpoint="{_label(name)}"}} {fmt.format(stats[key])}')
+
+    cache = response_cache.stats()
+    hashing = hashing_stats()
+    single_values = [
+        ('campus_requests_in_flight', 'gauge', 'Requests being handled by this process.', request_metrics.in_flight),
+        ('campus_slow_queries_total', 'counter', 'SQL statements slower than SLOW_QUERY_SECONDS.', request_metrics.slow_queries),
+        ('campus_response_cache_hits_total', 'counter', 'Response cache hits.', cache['hits']),
+        ('campus_response_cache_misses_total', 'counter', 'Response cache misses.', cache['misses']),
+        ('campus_response_cache_entries', 'gauge', 'Entries in the response cache.', cache['entries']),
+        ('campus_password_hash_queue_depth', 'gauge', 'Password hashes waiting or running.', hashing['queue_depth']),
+        ('campus_password_hash_seconds_total', 'counter', 'Time spent hashing passwords.', round(hashing['total_seconds'], 6)),
+    ]
+    for metric, kind, help_text, value in single_values:
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} {kind}')
+        lines.append(f'{metric} {value}')
+
+    return '\n'.join(lines) + '\n'
+
+
+# --- 4. HOOKING IT INTO THE APP ---
+
+def current_request_metrics():
+    # The measurement dict of the request being handled, or None
+    if not request:
+        return None
+    return request.environ.get(ENVIRON_KEY)
+
+def init_metrics(app):
+    for key, value in DEFAULT_SETTINGS.items():
+        app.config.setdefault(key, value)
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    @app.before_request
+    def start_timer():
+        in_flight = request_metrics.started()
+        request.environ['campus.in_flight'] = True
+        # Measure fewer requests when the process is busy, so metrics stay cheap
+        if in_flight > app.config['METRICS_LOAD_THRESHOLD']:
+            rate = app.config['METRICS_LOAD_SAMPLE_RATE']
+        else:
+            rate = app.config['METRICS_SAMPLE_RATE']
+        if rate >= 1.0 or random.random() < rate:
+            request.environ[ENVIRON_KEY] = {'start': time.perf_counter(), 'sql_statements': 0, 'sql_seconds': 0.0}
+
+    @app.after_request
+    def record_request(response):
+        measured = request.environ.get(ENVIRON_KEY)
+        if measured is not None and request.endpoint != 'metrics':
+            seconds = time.perf_counter() - measured['start']
+            # Streamed bodies (exports, the change feed) have no known size up front. Don't ask
+            # Werkzeug for one: it would read the whole generator into memory to find out.
+            size = 0 if response.is_streamed else (response.calculate_content_length() or 0)
+            request_metrics.record(request.endpoint or 'not_found', seconds,
+                                   measured['sql_statements'], measured['sql_seconds'], size)
+        return response
+
+    @app.teardown_request
+    def stop_timer(error=None):
+        if request.environ.pop('campus.in_flight', False):
+            request_metrics.finished()
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('campus_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['campus_query_start'].pop()
+
+        measured = current_request_metrics()
+        if measured is not None:
+            measured['sql_statements'] += 1
+            measured['sql_seconds'] += seconds
+
+        # Slow statements are always logged, whether or not the request was sampled
+        if seconds > app.config['SLOW_QUERY_SECONDS']:
+            request_metrics.slow_query()
+            app.logger.warning('Slow query (%.1f ms) on %s: %s', seconds * 1000,
+                               request.endpoint if request else 'no request', statement)
+
+    # The aggregates, for Prometheus to scrape
+    @app.route('/api/_metrics', endpoint='metrics')
+    def metrics():
+        return current_app.response_class(render_prometheus(), mimetype='text/plain; version=0.0.4')
@@ -13,6 +13,14 @@ class Announcement(db.Model):
     text = db.Column(db.Text, nullable=False)
     # When it was posted
     date = db.Column(db.String(50), default='Today')
+    # Change sequence number of the last write, and when it happened (set by triggers, see change_log.py)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime)
+
+    # Rows changed since a client's last sync (see /api/sync)
+    __table_args__ = (
+        db.Index('ix_announcement_version', 'version'),
+    )
 
     # Function to turn this data into a simple format for the web
     def to_dict(self):
@@ -37,6 +45,14 @@ class Course(db.Model):
     room = db.Column(db.String(20))
     # When the class is held
     time = db.Column(db.String(50))
+    # Change sequence number of the last write, and when it happened (set by triggers, see change_log.py)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime)
+
+    # Rows changed since a client's last sync (see /api/sync)
+    __table_args__ = (
+        db.Index('ix_course_version', 'version'),
+    )
     
     # Function to turn this data into a simple format for the web
     def to_dict(self):
@@ -66,6 +82,18 @@ class User(db.Model):
             'role': self.role
         }
 
+# --- 3b. Logged-out Tokens (shared by every server process, see tokens.py) ---
+class RevokedToken(db.Model):
+    # Increasing number, so each process can load just the revocations it hasn't seen
+    # (AUTOINCREMENT: numbers are never reused after old rows are cleaned up)
+    id = db.Column(db.Integer, primary_key=True)
+    # The token's 'jti'
+    jti = db.Column(db.String(32), unique=True, nullable=False)
+    # Unix time the token expires; after that the row can go
+    expires_at = db.Column(db.Float, nullable=False, index=True)
+
+    __table_args__ = {'sqlite_autoincrement': True}
+
 # Import the date/time library for recording attendance time
 from datetime import datetime
 
@@ -83,6 +111,22 @@ class Attendance(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     # Status: True for Present, False for Absent
     is_present = db.Column(db.Boolean, nullable=False)
+    # The day of the class; a student has at most one mark per course per day
+    session_date = db.Column(db.Date, nullable=False, default=lambda: datetime.utcnow().date())
+    # Change sequence number of the last write, and when it happened (set by triggers, see change_log.py)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Composite index so the attendance summary is answered from the index alone
+        db.Index('ix_attendance_user_course_present', 'user_id', 'course_code', 'is_present'),
+        # Makes marking idempotent: a retry updates the existing row (see mark_attendance)
+        db.Index('uq_attendance_user_course_session', 'user_id', 'course_code', 'session_date', unique=True),
+        # A student's marks changed since their last sync
+        db.Index('ix_attendance_user_version', 'user_id', 'version'),
+        # Never reuse an ID, not even one of the marks moved out to an archived term
+        {'sqlite_autoincrement': True},
+    )
 
     def to_dict(self):
         return {
@@ -90,8 +134,68 @@ class Attendance(db.Model):
             'user_id': self.user_id,
             'course_code': self.course_code,
             'date': self.timestamp.isoformat(), # Format date clearly
+            'session_date': self.session_date.isoformat(),
             'status': 'Present' if self.is_present else 'Absent'
         }
+# --- 4b. Attendance Totals (kept up to date by triggers, see attendance_stats.py) ---
+class AttendanceStats(db.Model):
+    # One row per student per course, so the summary never has to scan Attendance
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    course_code = db.Column(db.String(10), primary_key=True)
+    # How many classes the student was present for
+    present = db.Column(db.Integer, nullable=False, default=0)
+    # How many classes were marked (Present + Absent)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        # Same shape as each entry of the attendance summary
+        percentage = round((self.present / self.total) * 100, 2) if self.total > 0 else 0
+        return {
+            'course_code': self.course_code,
+            'present': self.present,
+            'total_classes': self.total,
+            'percentage': percentage
+        }
+# --- 4c. Archived Terms (closed terms moved out of Attendance, see archive.py) ---
+class ArchivedTerm(db.Model):
+    # The term's name, e.g. '2026-spring'
+    name = db.Column(db.String(30), primary_key=True)
+    # First and last class day of the term (both included)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    # The SQLite file holding the term's marks, inside ARCHIVE_DIR
+    file_name = db.Column(db.String(200), nullable=False)
+    # How many marks were moved, and when
+    rows = db.Column(db.Integer, nullable=False, default=0)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'rows': self.rows,
+            'archived_on': self.archived_at.isoformat()
+        }
+
+class ArchivedAttendanceStats(db.Model):
+    # Per-student totals of an archived term, so its summary never has to open the archive file
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    term = db.Column(db.String(30), db.ForeignKey('archived_term.name'), primary_key=True)
+    course_code = db.Column(db.String(10), primary_key=True)
+    present = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        # Same shape as AttendanceStats.to_dict(), plus the term
+        percentage = round((self.present / self.total) * 100, 2) if self.total > 0 else 0
+        return {
+            'term': self.term,
+            'course_code': self.course_code,
+            'present': self.present,
+            'total_classes': self.total,
+            'percentage': percentage
+        }
 # Import the date/time library for recording deadlines
 from datetime import datetime
 
@@ -113,10 +217,25 @@ class Assignment(db.Model):
     due_date = db.Column(db.DateTime, nullable=False)
     # Status: True for Done, False for Pending/Incomplete
     is_completed = db.Column(db.Boolean, default=False)
+    # Change sequence number of the last write, and when it happened (set by triggers, see change_log.py)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime)
 
-    def to_dict(self):
+    # Composite index so a user's assignments can be filtered and sorted by deadline in SQL
+    __table_args__ = (
+        db.Index('ix_assignment_user_due', 'user_id', 'due_date'),
+        # Deadline-first index so the reminder scanner reads only the upcoming range
+        db.Index('ix_assignment_due_open', 'due_date', 'is_completed'),
+        # A student's assignments changed since their last sync
+        db.Index('ix_assignment_user_version', 'user_id', 'version'),
+    )
+
+    def to_dict(self, now=None):
         # Calculate if the assignment is overdue for the dashboard view
-        is_overdue = self.due_date < datetime.utcnow() and not self.is_completed
+        # (list routes pass in one 'now' for the whole request)
+        if now is None:
+            now = datetime.utcnow()
+        is_overdue = self.due_date < now and not self.is_completed
 
         return {
             'id': self.id,
@@ -127,4 +246,63 @@ class Assignment(db.Model):
             'due_date': self.due_date.isoformat(),
             'completed': self.is_completed,
             'overdue': is_overdue
-        }
\ No newline at end of file
+        }
+
+# --- 6. Reminder Data Structure (queued by the deadline scanner) ---
+class Reminder(db.Model):
+    # This is the unique reminder ID
+    id = db.Column(db.Integer, primary_key=True)
+    # Who the reminder is for
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # The assignment that is coming due
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignment.id'), nullable=False)
+    # Which reminder this is, e.g. '24h' or '1h' before the deadline
+    window = db.Column(db.String(10), nullable=False)
+    # Copy of the deadline when the reminder was queued
+    due_date = db.Column(db.DateTime, nullable=False)
+    # When the scanner queued it, and when the client picked it up (None = not yet)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    delivered_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # One reminder per assignment per window, however many scans see it
+        db.Index('uq_reminder_assignment_window', 'assignment_id', 'window', unique=True),
+        # A user's undelivered reminders
+        db.Index('ix_reminder_user_delivered', 'user_id', 'delivered_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'assignment_id': self.assignment_id,
+            'window': self.window,
+            'due_date': self.due_date.isoformat(),
+            'created_on': self.created_at.isoformat()
+        }
+
+# --- 7. Change Log (filled in by triggers, see change_log.py) ---
+class ChangeSequence(db.Model):
+    __tablename__ = 'change_seq'
+    # A single row (id 1) holding the number of the latest change
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+    # Tombstones up to this number were pruned (see change_log.prune_tombstones)
+    pruned_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+class Tombstone(db.Model):
+    # The change sequence number of the delete
+    seq = db.Column(db.Integer, primary_key=True)
+    # Which table the row was in, and its ID
+    table_name = db.Column(db.String(30), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    # Owner of a deleted assignment or attendance mark (None for courses and announcements)
+    user_id = db.Column(db.Integer)
+    deleted_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # A student's deletes since their last sync (shared tables have user_id NULL)
+        db.Index('ix_tombstone_user_seq', 'user_id', 'seq'),
+        # The latest delete in one table (or one student's rows of it), for the response cache
+        db.Index('ix_tombstone_table_user_seq', 'table_name', 'user_id', 'seq'),
+    )
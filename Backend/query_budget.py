@@ -0,0 +1,114 @@
+import threading
+from functools import wraps
+from flask import request, current_app, make_response
+from sqlalchemy import event
+from models import db
+
+# --- 1. SETTINGS ---
+
+# QUERY_BUDGET_MODE: 'off' (no counting), 'warn' (log the route and its count) or 'raise' (fail the request)
+DEFAULT_MODE = 'warn'
+
+# Where the statement count of the current request is kept (one per request, also for batch sub-requests)
+ENVIRON_KEY = 'campus.query_count'
+
+
+class QueryBudgetExceeded(Exception):
+    # Raised in 'raise' mode when a route runs more SQL statements than it declared
+    pass
+
+
+# --- 2. DECLARING BUDGETS ---
+
+def query_budget(**budgets):
+    # Declare the most SQL statements a route may run, per HTTP method:
+    #   @query_budget(GET=1, POST=2)
+    # A method without a budget is not checked.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            mode = current_app.config.get('QUERY_BUDGET_MODE', DEFAULT_MODE)
+            budget = budgets.get(request.method)
+            if mode == 'off' or budget is None:
+                return view(*args, **kwargs)
+
+            request.environ[ENVIRON_KEY] = 0
+            response = make_response(view(*args, **kwargs))
+
+            if response.is_streamed:
+                # Streams (exports) run their queries while the body is sent, so check at the end
+                response.response = _check_after_stream(response.response, budget, mode, request.endpoint,
+                                                        request.environ, current_app.logger)
+            else:
+                check_budget(request.endpoint, request.environ[ENVIRON_KEY], budget, mode, current_app.logger)
+            return response
+
+        # Kept on the function so tests can list every route's budget
+        wrapper.query_budgets = dict(budgets)
+        return wrapper
+    return decorator
+
+def check_budget(endpoint, count, budget, mode, logger):
+    if count <= budget:
+        return
+    message = f'{endpoint} ran {count} SQL statements, over its budget of {budget}'
+    if mode == 'raise':
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+def _check_after_stream(chunks, budget, mode, endpoint, environ, logger):
+    yield from chunks
+    check_budget(endpoint, environ[ENVIRON_KEY], budget, mode, logger)
+
+
+# --- 3. COUNTING STATEMENTS ---
+
+def init_query_budget(app):
+    app.config.setdefault('QUERY_BUDGET_MODE', DEFAULT_MODE)
+    if app.config['QUERY_BUDGET_MODE'] == 'off':
+        return
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        # Only requests on a route with a budget have a counter
+        if request and ENVIRON_KEY in request.environ:
+            request.environ[ENVIRON_KEY] += 1
+
+
+# --- 4. COUNTING OUTSIDE A REQUEST (for tests and scripts) ---
+
+class QueryCounter:
+    # with QueryCounter(app) as counter: ...; counter.count / counter.statements
+    def __init__(self, app):
+        self.app = app
+        self.statements = []
+        self._lock = threading.Lock()
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.statements.append(statement)
+
+    def __enter__(self):
+        with self.app.app_context():
+            self._engine = db.engine
+        event.listen(self._engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self._engine, 'before_cursor_execute', self._record)
+        return False
+
+def route_budgets(app):
+    # {endpoint: {method: budget}} for every route that declares one
+    return {
+        endpoint: view.query_budgets
+        for endpoint, view in app.view_functions.items()
+        if hasattr(view, 'query_budgets')
+    }
@@ -0,0 +1,53 @@
+# pytest fixtures for SQL statement budgets. Enable with:  pytest -p query_budget_fixtures
+import pytest
+from app import create_app, init_db
+from cache import response_cache
+from timetable import timetable_index
+from query_budget import QueryCounter, route_budgets
+
+
+@pytest.fixture
+def budget_app():
+    # A fresh in-memory app where going over a route's budget fails the request
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'QUERY_BUDGET_MODE': 'raise',
+        'PASSWORD_HASH_WORKERS': 0,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+    })
+    init_db(app)
+    # The per-process caches still hold rows of the previous test's database
+    response_cache.clear()
+    timetable_index.clear()
+    return app
+
+@pytest.fixture
+def budget_client(budget_app):
+    # With PROPAGATE_EXCEPTIONS on (TESTING), QueryBudgetExceeded surfaces in the test
+    return budget_app.test_client()
+
+@pytest.fixture
+def budgets(budget_app):
+    # {endpoint: {method: budget}} for every route, to check that none was forgotten
+    return route_budgets(budget_app)
+
+@pytest.fixture
+def assert_max_queries(budget_app):
+    # with assert_max_queries(2): client.get(...)
+    def checker(limit):
+        return _MaxQueries(budget_app, limit)
+    return checker
+
+
+class _MaxQueries(QueryCounter):
+    def __init__(self, app, limit):
+        super().__init__(app)
+        self.limit = limit
+
+    def __exit__(self, *exc_info):
+        super().__exit__(*exc_info)
+        if exc_info[0] is None:
+            assert self.count <= self.limit, (
+                f'{self.count} SQL statements, expected at most {self.limit}:\n' + '\n'.join(self.statements))
+        return False
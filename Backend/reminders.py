@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert
+from models import db, Assignment, Reminder
+
+# --- 1. SETTINGS ---
+
+DEFAULT_SETTINGS = {
+    # Reminder windows: name -> hours before the deadline
+    'REMINDER_WINDOWS': {'24h': 24, '1h': 1},
+    # Seconds between scans
+    'REMINDER_SCAN_INTERVAL': 300,
+    # Threads that scan windows in parallel
+    'REMINDER_SCAN_WORKERS': 2,
+}
+
+
+# --- 2. ONE SCAN ---
+
+def scan_window(app, name, hours, now):
+    # Range scan on the (due_date, is_completed) index: only assignments due between now and
+    # now + window are read, so the cost follows the number of upcoming deadlines, not table size.
+    with app.app_context():
+        upcoming = db.session.query(Assignment.id, Assignment.user_id, Assignment.due_date) \
+            .filter(Assignment.due_date >= now,
+                    Assignment.due_date < now + timedelta(hours=hours),
+                    Assignment.is_completed.isnot(True)) \
+            .all()
+
+        # Batch the reminders per user, then queue them all with one executemany.
+        # The unique (assignment_id, window) index makes re-scanning the same deadline a no-op.
+        per_user = defaultdict(list)
+        for assignment_id, user_id, due_date in upcoming:
+            per_user[user_id].append({
+                'user_id': user_id,
+                'assignment_id': assignment_id,
+                'window': name,
+                'due_date': due_date,
+                'created_at': now
+            })
+
+        rows = [row for user_rows in per_user.values() for row in user_rows]
+        if rows:
+            db.session.execute(insert(Reminder).on_conflict_do_nothing(), rows)
+            db.session.commit()
+        return {'window': name, 'upcoming': len(upcoming), 'users': len(per_user)}
+
+
+# --- 3. THE SCANNER ---
+
+class DeadlineScanner:
+    # Runs scan cycles every REMINDER_SCAN_INTERVAL seconds on a background thread,
+    # handing each reminder window to a small thread pool
+    def __init__(self, app):
+        for key, value in DEFAULT_SETTINGS.items():
+            app.config.setdefault(key, value)
+        self.app = app
+        self.pool = ThreadPoolExecutor(max_workers=app.config['REMINDER_SCAN_WORKERS'],
+                                       thread_name_prefix='deadline-scan')
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_cycle = None
+
+    def run_cycle(self):
+        now = datetime.utcnow()
+        start = time.perf_counter()
+        futures = [self.pool.submit(scan_window, self.app, name, hours, now)
+                   for name, hours in self.app.config['REMINDER_WINDOWS'].items()]
+        windows = [future.result() for future in futures]
+        self.last_cycle = {'started': now.isoformat(), 'seconds': round(time.perf_counter() - start, 4),
+                           'windows': windows}
+        return self.last_cycle
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_cycle()
+            except Exception:
+                self.app.logger.exception('Deadline scan failed')
+            self._stop.wait(self.app.config['REMINDER_SCAN_INTERVAL'])
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='deadline-scanner', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.pool.shutdown(wait=True)
+
+
+# --- 4. TRIGGERS THAT KEEP REMINDERS IN STEP WITH ASSIGNMENTS ---
+
+# The unique (assignment_id, window) index would keep a moved deadline from ever being
+# reminded again, and a finished or deleted assignment would still be reminded. SQLite
+# drops those reminders itself, in the same transaction as the change, whichever route made it.
+REMINDER_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS reminder_after_assignment_update
+    AFTER UPDATE OF due_date, is_completed ON assignment
+    BEGIN
+        DELETE FROM reminder WHERE assignment_id = NEW.id
+        AND (due_date IS NOT NEW.due_date OR (NEW.is_completed AND delivered_at IS NULL));
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS reminder_after_assignment_delete AFTER DELETE ON assignment
+    BEGIN
+        DELETE FROM reminder WHERE assignment_id = OLD.id;
+    END
+    ''',
+]
+
+# The same rule for reminders queued before the triggers existed
+STALE_REMINDERS = '''
+    DELETE FROM reminder WHERE NOT EXISTS (
+        SELECT 1 FROM assignment WHERE assignment.id = reminder.assignment_id
+        AND assignment.due_date = reminder.due_date
+        AND (assignment.is_completed IS NOT 1 OR reminder.delivered_at IS NOT NULL)
+    )
+'''
+
+
+def install_reminder_triggers():
+    for statement in REMINDER_TRIGGERS:
+        db.session.execute(text(statement))
+    db.session.execute(text(STALE_REMINDERS))
+    db.session.commit()
@@ -0,0 +1,92 @@
+import json
+from datetime import datetime
+from flask import current_app
+from models import db, Announcement, Course, Attendance, Assignment
+
+# Use orjson when it is installed (several times faster); fall back to the standard json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# --- 1. PUBLIC FIELDS OF EACH MODEL ---
+
+# (public name, column, converter) in the same shape as each model's to_dict().
+# Selecting just these columns returns plain tuples instead of full ORM objects.
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+def _status(is_present):
+    return 'Present' if is_present else 'Absent'
+
+FIELDS = {
+    Announcement: [
+        ('id', Announcement.id, None),
+        ('title', Announcement.title, None),
+        ('content', Announcement.text, None),
+        ('posted_on', Announcement.date, None),
+    ],
+    Course: [
+        ('id', Course.id, None),
+        ('code', Course.code, None),
+        ('name', Course.name, None),
+        ('professor', Course.prof, None),
+        ('room_num', Course.room, None),
+        ('time_slot', Course.time, None),
+    ],
+    Attendance: [
+        ('id', Attendance.id, None),
+        ('user_id', Attendance.user_id, None),
+        ('course_code', Attendance.course_code, None),
+        ('date', Attendance.timestamp, _isoformat),
+        ('session_date', Attendance.session_date, _isoformat),
+        ('status', Attendance.is_present, _status),
+    ],
+    Assignment: [
+        ('id', Assignment.id, None),
+        ('user_id', Assignment.user_id, None),
+        ('course_code', Assignment.course_code, None),
+        ('title', Assignment.title, None),
+        ('description', Assignment.description, None),
+        ('due_date', Assignment.due_date, _isoformat),
+        ('completed', Assignment.is_completed, None),
+    ],
+}
+
+
+# --- 2. QUERY AND CONVERT ---
+
+def select_rows(model, query=None):
+    # Start a query that returns only the public columns as tuples.
+    # Pass an existing Model.query to keep its filters and ordering.
+    columns = [column for _, column, _ in FIELDS[model]]
+    if query is None:
+        return db.session.query(*columns)
+    return query.with_entities(*columns)
+
+def row_to_dict(model, row, now=None):
+    data = {}
+    for (name, _, convert), value in zip(FIELDS[model], row):
+        data[name] = convert(value) if convert else value
+    if model is Assignment:
+        # Same rule as Assignment.to_dict()
+        due_date, completed = row[5], row[6]
+        data['overdue'] = due_date < (now or datetime.utcnow()) and not completed
+    return data
+
+def rows_to_dicts(model, rows, now=None):
+    if model is Assignment and now is None:
+        now = datetime.utcnow()
+    return [row_to_dict(model, row, now) for row in rows]
+
+
+# --- 3. FAST JSON ---
+
+def dumps(data):
+    # Returns bytes; keys are sorted to match Flask's jsonify output
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+def json_response(data, status=200):
+    return current_app.response_class(dumps(data), status=status, mimetype='application/json')
@@ -0,0 +1,71 @@
+import os
+from sqlalchemy import event
+
+# --- 1. STORAGE PROFILES ---
+
+# Each profile is a set of SQLite PRAGMAs run on every new connection, plus pool settings.
+# 'development' keeps SQLite's defaults; 'production' lets readers work while a write commits.
+STORAGE_PROFILES = {
+    'development': {
+        'pragmas': {
+            'busy_timeout': 5000,       # Wait up to 5s for a lock instead of failing at once
+        },
+        'engine_options': {},
+    },
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',      # Readers no longer block behind writers
+            'synchronous': 'NORMAL',    # Safe with WAL, one fsync per checkpoint instead of per commit
+            'cache_size': -64000,       # 64 MB page cache (negative means KiB)
+            'mmap_size': 268435456,     # Read up to 256 MB straight from memory-mapped pages
+            'temp_store': 'MEMORY',     # Sorts and temp tables stay in RAM
+            'busy_timeout': 5000,       # Wait up to 5s for the write lock instead of "database is locked"
+        },
+        'engine_options': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 30,
+            'pool_pre_ping': False,
+        },
+    },
+}
+
+DEFAULT_PROFILE = 'production'
+
+
+def get_profile(name=None):
+    # Pick the profile by name, falling back to the CAMPUS_DB_PROFILE environment variable
+    name = name or os.environ.get('CAMPUS_DB_PROFILE', DEFAULT_PROFILE)
+    if name not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown storage profile '{name}'. Choose one of: {', '.join(STORAGE_PROFILES)}")
+    return name, STORAGE_PROFILES[name]
+
+
+# --- 2. APPLYING A PROFILE ---
+
+def configure_storage(app, profile=None):
+    # Fill in the database URI and pool settings for the chosen profile
+    name, settings = get_profile(profile)
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', os.environ.get('DATABASE_URL', 'sqlite:///campus_data.db'))
+    app.config['CAMPUS_DB_PROFILE'] = name
+    app.config['SQLITE_PRAGMAS'] = dict(settings['pragmas'])
+
+    # Pool options only make sense for file databases (in-memory SQLite uses a single connection)
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite') and ':memory:' not in uri and uri != 'sqlite://':
+        engine_options = dict(settings['engine_options'])
+        engine_options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
+
+def install_pragmas(engine, pragmas):
+    # Run the PRAGMAs on every new SQLite connection the pool opens
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for key, value in pragmas.items():
+            cursor.execute(f'PRAGMA {key}={value}')
+        cursor.close()
@@ -0,0 +1,55 @@
+# Shared fixtures for the backend tests. Run from the Backend folder:  python -m pytest tests
+import os
+import sys
+from datetime import date, datetime, timedelta
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from query_budget_fixtures import budget_app, budget_client, budgets, assert_max_queries # noqa: E402,F401
+from models import db, User, Course, Announcement, Assignment, Attendance, Reminder # noqa: E402
+from hashing import hash_password # noqa: E402
+from werkzeug.security import generate_password_hash # noqa: E402
+from archive import archive_term # noqa: E402
+
+STUDENTS = 3
+COURSES = ['CS101', 'MA201', 'PH110', 'EN150']
+
+
+@pytest.fixture
+def seeded_app(budget_app, tmp_path):
+    # Several students, each with marks and assignments in several courses, so a route
+    # that runs one query per row goes over its budget. One term is archived.
+    budget_app.config['ARCHIVE_DIR'] = str(tmp_path)
+    today = datetime.utcnow().date()
+    with budget_app.app_context():
+        for number in range(1, STUDENTS + 1):
+            db.session.add(User(username=f'student{number}', password_hash=hash_password('secret')))
+        # Hashed with an older cost, so logging in upgrades the hash
+        db.session.add(User(username='legacy', password_hash=generate_password_hash('secret', method='pbkdf2:sha256:500')))
+        for index, code in enumerate(COURSES):
+            db.session.add(Course(code=code, name=f'Course {code}', prof=f'Prof {index}',
+                                  room=f'R{index}', time=f'M W {9 + index}:00'))
+        for number in range(5):
+            db.session.add(Announcement(title=f'Exam notice {number}', text='The exam room has changed.'))
+        db.session.flush()
+
+        for user_id in range(1, STUDENTS + 1):
+            for index, code in enumerate(COURSES):
+                # Last term's marks (archived below) and this term's
+                for day in (date(2025, 2, 3), date(2025, 2, 5), today - timedelta(days=7), today - timedelta(days=1)):
+                    db.session.add(Attendance(user_id=user_id, course_code=code, session_date=day,
+                                              is_present=(index + day.day) % 3 != 0))
+                db.session.add(Assignment(user_id=user_id, course_code=code, title=f'Homework {index}',
+                                          due_date=datetime.utcnow() + timedelta(hours=12 * (index - 1))))
+        db.session.flush()
+        for assignment in Assignment.query.filter_by(user_id=1).all():
+            db.session.add(Reminder(user_id=1, assignment_id=assignment.id, window='24h', due_date=assignment.due_date))
+        db.session.commit()
+
+        archive_term('2025-spring', date(2025, 1, 6), date(2025, 5, 30))
+    return budget_app
+
+@pytest.fixture
+def seeded_client(seeded_app):
+    return seeded_app.test_client()
@@ -0,0 +1,49 @@
+# Archiving a term must move exactly the marks it copied: a mark changed between copying
+# and deleting (same number of rows) would leave the archive and its totals disagreeing
+import sqlite3
+from datetime import date
+import pytest
+from sqlalchemy import event
+from app import create_app, init_db
+from archive import archive_term
+from models import db, Attendance, ArchivedTerm, AttendanceStats
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    # A database file, so a second connection can write while the archive is copied
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'campus.db'}",
+                      'PASSWORD_HASH_WORKERS': 0, 'ARCHIVE_DIR': str(tmp_path / 'archive')})
+    init_db(app)
+    with app.app_context():
+        for day in (3, 4, 5):
+            db.session.add(Attendance(user_id=1, course_code='CS101', session_date=date(2025, 2, day), is_present=True))
+        db.session.commit()
+    return app
+
+
+def test_a_mark_changed_during_the_copy_stops_the_archive(file_app, tmp_path):
+    def flip_a_mark(conn, cursor, statement, *args):
+        if statement.startswith('INSERT INTO archive.attendance_stats'):
+            other = sqlite3.connect(tmp_path / 'campus.db')
+            other.execute('UPDATE attendance SET is_present = 0 WHERE id = 1')
+            other.commit()
+            other.close()
+
+    with file_app.app_context():
+        event.listen(db.engine, 'after_cursor_execute', flip_a_mark)
+        try:
+            with pytest.raises(ValueError, match='changed'):
+                archive_term('2025-spring', date(2025, 1, 6), date(2025, 5, 30))
+        finally:
+            event.remove(db.engine, 'after_cursor_execute', flip_a_mark)
+
+        # Nothing moved, and no archive file is left behind
+        assert ArchivedTerm.query.count() == 0
+        assert Attendance.query.count() == 3
+        assert db.session.get(AttendanceStats, (1, 'CS101')).present == 2
+        assert not list((tmp_path / 'archive').iterdir())
+
+        term = archive_term('2025-spring', date(2025, 1, 6), date(2025, 5, 30))
+        assert term.rows == 3
+        assert Attendance.query.count() == 0
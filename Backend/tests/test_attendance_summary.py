@@ -0,0 +1,44 @@
+# The attendance summary must cost the same few statements however many courses a
+# student has (it used to run a DISTINCT plus two COUNTs per course).
+from datetime import date, timedelta
+import pytest
+from query_budget import QueryCounter
+
+
+def mark_courses(client, user_id, courses, days=3):
+    # Present on the first day of each course, absent after that
+    for number in range(courses):
+        for day in range(days):
+            response = client.post('/api/attendance/mark', json={
+                'user_id': user_id,
+                'course_code': f'C{number:02d}',
+                'session_date': (date(2026, 3, 2) + timedelta(days=day)).isoformat(),
+                'is_present': day == 0
+            })
+            assert response.status_code == 201
+
+
+@pytest.mark.parametrize('courses', [1, 8, 30])
+def test_summary_statement_count_does_not_grow_with_courses(budget_app, budget_client, courses):
+    mark_courses(budget_client, 1, courses)
+    mark_courses(budget_client, 2, 2) # Another student's marks must not show up
+
+    with QueryCounter(budget_app) as counter:
+        response = budget_client.get('/api/attendance/summary/1')
+
+    assert response.status_code == 200
+    assert counter.count == 1, counter.statements
+    summary = response.get_json()
+    assert [entry['course_code'] for entry in summary] == [f'C{number:02d}' for number in range(courses)]
+    assert all(entry['present'] == 1 and entry['total_classes'] == 3 for entry in summary)
+    assert summary[0]['percentage'] == 33.33
+
+
+def test_summary_counts_a_remarked_day_once(budget_client):
+    mark_courses(budget_client, 1, 1, days=1)
+    # A retried or corrected mark for the same day replaces the first one
+    budget_client.post('/api/attendance/mark', json={
+        'user_id': 1, 'course_code': 'C00', 'session_date': '2026-03-02', 'is_present': False})
+
+    summary = budget_client.get('/api/attendance/summary/1').get_json()
+    assert summary == [{'course_code': 'C00', 'present': 0, 'total_classes': 1, 'percentage': 0}]
@@ -0,0 +1,46 @@
+# The cached GET routes read the tables' change numbers at most once per
+# RESPONSE_CACHE_VERSION_SECONDS, so a hit inside that time runs no SQL at all
+import sqlite3
+from app import create_app, init_db
+from cache import response_cache
+
+
+def test_a_cache_hit_runs_no_sql(budget_app, budget_client, assert_max_queries):
+    budget_client.post('/api/courses/', json={'code': 'CS101', 'name': 'Intro', 'time': 'TBA'})
+    assert budget_client.get('/api/courses/').status_code == 200
+    with assert_max_queries(0):
+        assert budget_client.get('/api/courses/').status_code == 200
+    assert response_cache.stats()['hits'] == 1
+
+
+def test_this_process_reads_its_own_writes_at_once(budget_app, budget_client):
+    response_cache.version_seconds = 60
+    assert budget_client.get('/api/courses/').get_json() == []
+    budget_client.post('/api/courses/', json={'code': 'CS101', 'name': 'Intro', 'time': 'TBA'})
+    assert [course['code'] for course in budget_client.get('/api/courses/').get_json()] == ['CS101']
+
+
+def test_another_workers_write_shows_once_the_interval_passes(tmp_path):
+    # Another worker's write reaches this process only through the database file
+    path = tmp_path / 'campus.db'
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'PASSWORD_HASH_WORKERS': 0,
+        'RESPONSE_CACHE_VERSION_SECONDS': 60,
+    })
+    init_db(app)
+    response_cache.clear()
+    client = app.test_client()
+    assert client.get('/api/courses/').get_json() == []
+
+    other_worker = sqlite3.connect(path)
+    other_worker.execute("INSERT INTO course (code, name, time) VALUES ('CS101', 'Intro', 'TBA')")
+    other_worker.commit()
+    other_worker.close()
+
+    # Inside the interval the old answer is served...
+    assert client.get('/api/courses/').get_json() == []
+    # ...and once it has passed, the change numbers are read again
+    response_cache.version_seconds = 0
+    assert [course['code'] for course in client.get('/api/courses/').get_json()] == ['CS101']
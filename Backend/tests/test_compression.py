@@ -0,0 +1,26 @@
+# Compressed bodies differ byte for byte from the plain one, so they must not share a strong ETag
+import pytest
+from models import db, Announcement
+
+
+@pytest.fixture
+def posts(budget_app):
+    with budget_app.app_context():
+        db.session.execute(db.insert(Announcement), [
+            {'title': f'Notice {number}', 'text': 'The exam room has changed. ' * 5} for number in range(30)
+        ])
+        db.session.commit()
+
+
+@pytest.mark.parametrize('encoding', ['gzip', 'deflate'])
+def test_compressed_responses_get_a_weak_etag(budget_client, posts, encoding):
+    plain = budget_client.get('/api/announcements/?limit=20', headers={'Accept-Encoding': 'identity'})
+    compressed = budget_client.get('/api/announcements/?limit=20', headers={'Accept-Encoding': encoding})
+    assert compressed.headers['Content-Encoding'] == encoding
+    assert compressed.headers['ETag'] == f"W/{plain.headers['ETag']}"
+
+    # The weak tag still revalidates, and comes back as the client has it
+    again = budget_client.get('/api/announcements/?limit=20', headers={
+        'Accept-Encoding': encoding, 'If-None-Match': compressed.headers['ETag']})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == compressed.headers['ETag']
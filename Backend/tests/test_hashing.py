@@ -0,0 +1,22 @@
+# Shorthand hash methods are written out in full by werkzeug; needs_rehash must see through that
+import pytest
+from werkzeug.security import generate_password_hash
+from hashing import configure_hashing, needs_rehash, DEFAULT_METHOD
+
+
+@pytest.fixture(autouse=True)
+def restore_method():
+    yield
+    configure_hashing(method=DEFAULT_METHOD)
+
+
+@pytest.mark.parametrize('configured', ['scrypt', 'pbkdf2', 'pbkdf2:sha256', 'pbkdf2:sha256:1000'])
+def test_a_hash_made_with_the_configured_method_is_kept(configured):
+    configure_hashing(method=configured)
+    assert not needs_rehash(generate_password_hash('secret', configured))
+
+
+def test_a_hash_with_another_cost_is_upgraded():
+    configure_hashing(method='pbkdf2:sha256:1000')
+    assert needs_rehash(generate_password_hash('secret', 'pbkdf2:sha256:500'))
+    assert needs_rehash(generate_password_hash('secret', 'scrypt'))
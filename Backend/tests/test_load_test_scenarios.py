@@ -0,0 +1,23 @@
+# benchmarks/load_test.py must time every route that has a budget (the endless change
+# stream aside), so a slow new route shows up in the load numbers too
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from load_test import scenarios # noqa: E402
+from test_query_budgets import endpoint_of # noqa: E402
+
+
+def fake_send(method, path, body, headers=None):
+    # Stands in for the setup requests some path makers send
+    return 201, json.dumps({'id': 1, 'token': 'token'}).encode()
+
+
+def test_load_test_covers_every_budgeted_route(budget_app, budgets):
+    timed = {(endpoint_of(budget_app, method, make_path()), method)
+             for _, method, make_path, *_ in scenarios(fake_send, 10, 10, 10, random.Random(1))}
+    declared = {(endpoint, method) for endpoint, methods in budgets.items() for method in methods}
+    assert declared - timed == {('stream_api.stream_changes', 'GET')}
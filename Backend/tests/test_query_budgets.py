@@ -0,0 +1,79 @@
+# Calls every route that declares a @query_budget against seeded data, in 'raise' mode:
+# a route that runs more SQL statements than its budget fails with QueryBudgetExceeded.
+from datetime import datetime, timedelta
+import pytest
+
+TODAY = datetime.utcnow().date().isoformat()
+NEXT_WEEK = (datetime.utcnow() + timedelta(days=7)).replace(microsecond=0).isoformat()
+
+# (method, path, JSON body). Each runs on a freshly seeded database.
+BUDGET_REQUESTS = [
+    ('GET', '/api/announcements/?limit=2', None),
+    ('POST', '/api/announcements/', {'title': 'Library hours', 'content': 'Open late this week.'}),
+    ('GET', '/api/announcements/search?q=exam', None),
+    ('GET', '/api/announcements/1', None),
+    ('PUT', '/api/announcements/1', {'title': 'Exam notice (updated)'}),
+    ('DELETE', '/api/announcements/2', None),
+    ('GET', '/api/courses/', None),
+    ('POST', '/api/courses/', {'code': 'CH100', 'name': 'Chemistry', 'professor': 'Prof 9', 'room': 'R9',
+                               'time': 'F 16:00-17:00'}),
+    ('GET', '/api/courses/1', None),
+    ('PUT', '/api/courses/1', {'room': 'R8'}),
+    ('DELETE', '/api/courses/4', None),
+    ('GET', '/api/courses/conflicts', None),
+    ('POST', '/api/auth/register', {'username': 'newcomer', 'password': 'secret'}),
+    ('POST', '/api/auth/login', {'username': 'student1', 'password': 'secret'}),
+    ('POST', '/api/auth/login', {'username': 'legacy', 'password': 'secret'}),
+    ('POST', '/api/auth/logout', None),
+    ('POST', '/api/attendance/mark', {'user_id': 1, 'course_code': 'CS101', 'session_date': TODAY}),
+    ('POST', '/api/attendance/mark/bulk', {'course_code': 'CS101', 'session_date': TODAY,
+                                           'entries': [{'user_id': 1}, {'user_id': 2, 'is_present': False},
+                                                       {'user_id': 3}]}),
+    ('GET', '/api/attendance/summary/1', None),
+    ('GET', '/api/attendance/summary/1?term=all', None),
+    ('GET', '/api/attendance/history/1', None),
+    ('GET', '/api/assignments/1', None),
+    ('GET', '/api/assignments/1?status=pending&sort=-due_date', None),
+    ('POST', '/api/assignments/1', {'course_code': 'CS101', 'title': 'Essay', 'due_date': NEXT_WEEK}),
+    ('PUT', '/api/assignments/1/1', {'is_completed': True}),
+    ('DELETE', '/api/assignments/1/2', None),
+    ('GET', '/api/export/attendance?format=csv', None),
+    ('GET', '/api/export/assignments', None),
+    ('GET', '/api/dashboard/1', None),
+    ('GET', '/api/reminders/1', None),
+    ('POST', '/api/reminders/1/delivered', {'ids': [1, 2]}),
+    ('GET', '/api/stream?topics=courses', None),
+    ('GET', '/api/sync?since=0&user_id=1', None),
+    ('POST', '/api/batch', {'requests': [{'method': 'GET', 'path': '/api/dashboard/2'},
+                                         {'method': 'GET', 'path': '/api/courses/'}]}),
+]
+
+
+def endpoint_of(app, method, path):
+    return app.url_map.bind('localhost').match(path.split('?')[0], method)[0]
+
+
+@pytest.mark.parametrize('method, path, body', BUDGET_REQUESTS, ids=[f'{m} {p}' for m, p, _ in BUDGET_REQUESTS])
+def test_route_stays_within_its_budget(seeded_app, seeded_client, method, path, body):
+    headers = {}
+    if path == '/api/auth/logout':
+        login = seeded_client.post('/api/auth/login', json={'username': 'student1', 'password': 'secret'})
+        headers['Authorization'] = f"Bearer {login.get_json()['token']}"
+
+    response = seeded_client.open(path, method=method, json=body, headers=headers)
+    if path.startswith('/api/stream'):
+        # The feed never ends on its own; its budget covers the setup before the first event
+        response.close()
+    else:
+        # Streamed exports run their query while the body is read, and are checked at the end
+        response.get_data()
+    assert response.status_code < 400, response.get_data(as_text=True)
+    if path == '/api/batch':
+        for sub_response in response.get_json()['responses']:
+            assert sub_response['status'] < 400, sub_response
+
+
+def test_every_budget_is_exercised(budget_app, budgets):
+    exercised = {(endpoint_of(budget_app, method, path), method) for method, path, _ in BUDGET_REQUESTS}
+    declared = {(endpoint, method) for endpoint, methods in budgets.items() for method in methods}
+    assert declared - exercised == set()
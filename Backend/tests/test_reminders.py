@@ -0,0 +1,45 @@
+# A reminder must follow its assignment: a moved deadline is reminded again, and a
+# finished or deleted assignment is not reminded at all
+from datetime import datetime, timedelta
+from models import db, Assignment, Reminder
+from reminders import scan_window
+
+
+def add_assignment(app, due_date):
+    with app.app_context():
+        assignment = Assignment(user_id=1, course_code='CS101', title='Essay', due_date=due_date)
+        db.session.add(assignment)
+        db.session.commit()
+        return assignment.id
+
+
+def waiting(client):
+    return [(r['assignment_id'], r['due_date']) for r in client.get('/api/reminders/1').get_json()]
+
+
+def test_a_moved_deadline_is_reminded_again(budget_app, budget_client):
+    now = datetime.utcnow()
+    task_id = add_assignment(budget_app, now + timedelta(hours=2))
+    scan_window(budget_app, '24h', 24, now)
+    reminder_id = budget_client.get('/api/reminders/1').get_json()[0]['id']
+    budget_client.post('/api/reminders/1/delivered', json={'ids': [reminder_id]})
+
+    new_due = now + timedelta(hours=20)
+    response = budget_client.put(f'/api/assignments/1/{task_id}', json={'due_date': new_due.isoformat()})
+    assert response.status_code == 200
+    scan_window(budget_app, '24h', 24, now)
+    assert waiting(budget_client) == [(task_id, new_due.isoformat())]
+
+
+def test_finished_and_deleted_assignments_are_not_reminded(budget_app, budget_client):
+    now = datetime.utcnow()
+    done_id = add_assignment(budget_app, now + timedelta(hours=2))
+    gone_id = add_assignment(budget_app, now + timedelta(hours=3))
+    scan_window(budget_app, '24h', 24, now)
+    assert len(waiting(budget_client)) == 2
+
+    budget_client.put(f'/api/assignments/1/{done_id}', json={'is_completed': True})
+    budget_client.delete(f'/api/assignments/1/{gone_id}')
+    assert waiting(budget_client) == []
+    with budget_app.app_context():
+        assert Reminder.query.count() == 0
@@ -0,0 +1,119 @@
+# The change feed reads the shared change log, so a stream sees writes from every server
+# process, its event ids are change numbers, and a reconnect can resume on any process
+import pytest
+from app import create_app, init_db
+from events import change_feed
+
+
+def stream_app(path):
+    # Two of these on one database file stand in for two gunicorn workers
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'QUERY_BUDGET_MODE': 'raise',
+        'PASSWORD_HASH_WORKERS': 0,
+        'STREAM_POLL_SECONDS': 0.05,
+        'STREAM_HEARTBEAT_SECONDS': 0.2,
+    })
+    init_db(app)
+    return app
+
+
+def events_of(response, count):
+    # The first `count` events (id, name, data) of an open stream
+    events, lines = [], []
+    for chunk in response.response:
+        for line in chunk.decode().split('\n'):
+            if line:
+                lines.append(line)
+            elif lines and lines[0].startswith('id: '):
+                fields = dict(line.split(': ', 1) for line in lines)
+                events.append((int(fields['id']), fields['event'], fields['data']))
+                lines = []
+                if len(events) == count:
+                    return events
+            else:
+                lines = []
+    return events
+
+
+@pytest.fixture
+def workers(tmp_path):
+    first, second = stream_app(tmp_path / 'campus.db'), stream_app(tmp_path / 'campus.db')
+    yield first, second
+    for app in (first, second):
+        feed = app.extensions.get('change_feed')
+        assert feed is None or feed.listeners == 0
+
+
+def test_a_stream_sees_writes_made_by_another_worker(workers):
+    first, second = workers
+    stream = first.test_client().get('/api/stream?topics=courses')
+    created = second.test_client().post('/api/courses/', json={'code': 'CS101', 'name': 'Intro', 'time': 'TBA'})
+    assert created.status_code == 201
+
+    [(event_id, name, data)] = events_of(stream, 1)
+    assert name == 'courses.created'
+    assert '"CS101"' in data
+    with second.app_context():
+        from change_log import current_seq
+        assert event_id == current_seq()
+    stream.close()
+
+
+def test_last_event_id_resumes_on_another_worker(workers):
+    first, second = workers
+    writer = first.test_client()
+    writer.post('/api/announcements/', json={'title': 'One', 'content': 'First'})
+    stream = first.test_client().get('/api/stream?topics=announcements&last_event_id=0')
+    [(seen, _, _)] = events_of(stream, 1)
+    stream.close()
+
+    # Missed while disconnected: an edit and a delete
+    post_id = writer.post('/api/announcements/', json={'title': 'Two', 'content': 'Second'}).get_json()['id']
+    writer.put(f'/api/announcements/{post_id}', json={'title': 'Two (edited)'})
+    writer.delete('/api/announcements/1')
+
+    resumed = second.test_client().get('/api/stream?topics=announcements', headers={'Last-Event-ID': str(seen)})
+    events = events_of(resumed, 2)
+    resumed.close()
+    assert [name for _, name, _ in events] == ['announcements.updated', 'announcements.deleted']
+    assert 'Two (edited)' in events[0][2] and events[1][2] == '{"id": 1}'
+    assert seen < events[0][0] < events[1][0]
+
+
+def test_streams_over_the_limit_get_503(budget_app, budget_client):
+    budget_app.config['STREAM_MAX_CLIENTS'] = 2
+    first = budget_client.get('/api/stream?topics=courses')
+    second = budget_client.get('/api/stream?topics=announcements')
+    assert (first.status_code, second.status_code) == (200, 200)
+
+    refused = budget_client.get('/api/stream')
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == '3'
+
+    # A listener leaving frees its place
+    first.close()
+    third = budget_client.get('/api/stream')
+    assert third.status_code == 200
+    second.close()
+    third.close()
+    assert change_feed(budget_app).listeners == 0
+
+
+def test_resuming_from_before_pruned_deletes_resets(workers):
+    first, second = workers
+    writer = first.test_client()
+    writer.post('/api/announcements/', json={'title': 'One', 'content': 'First'})
+    writer.delete('/api/announcements/1')
+    with first.app_context():
+        from models import db
+        db.session.execute(db.text("UPDATE tombstone SET deleted_at = '2000-01-01 00:00:00.000'"))
+        db.session.commit()
+    assert first.test_cli_runner().invoke(args=['prune-tombstones']).exit_code == 0
+
+    # The delete after change 1 is gone, so the client has to refetch
+    resumed = second.test_client().get('/api/stream?topics=announcements', headers={'Last-Event-ID': '1'})
+    [(event_id, name, data)] = events_of(resumed, 1)
+    resumed.close()
+    assert (event_id, name, data) == (2, 'stream.reset', '{}')
@@ -0,0 +1,79 @@
+# Tombstones older than the retention period are pruned (flask --app app prune-tombstones);
+# readers that could have missed one of those deletes must start again from scratch
+from models import db
+from cache import response_cache
+
+
+def age_tombstones(app):
+    with app.app_context():
+        db.session.execute(db.text("UPDATE tombstone SET deleted_at = '2000-01-01 00:00:00.000'"))
+        db.session.commit()
+
+
+def prune(app, *args):
+    result = app.test_cli_runner().invoke(args=['prune-tombstones', *args])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def add_course(client, code, room, time):
+    return client.post('/api/courses/', json={'code': code, 'name': code, 'room': room, 'time': time})
+
+
+def test_prune_keeps_recent_tombstones(budget_app, budget_client):
+    for code in ('CS101', 'MA201', 'PH110'):
+        add_course(budget_client, code, None, 'TBA')
+    budget_client.delete('/api/courses/1')
+    age_tombstones(budget_app)
+    budget_client.delete('/api/courses/2')
+
+    assert 'Pruned 1 tombstones older than 90 days' in prune(budget_app)
+    assert 'Pruned 0 tombstones older than 30 days' in prune(budget_app, '--days', '30')
+    with budget_app.app_context():
+        assert db.session.execute(db.text('SELECT row_id FROM tombstone')).scalars().all() == [2]
+
+
+def test_sync_from_before_the_pruned_deletes_must_start_again(budget_app, budget_client):
+    add_course(budget_client, 'CS101', None, 'TBA')
+    seq = budget_client.get('/api/sync?since=0').get_json()['seq']
+    budget_client.delete('/api/courses/1')
+    add_course(budget_client, 'MA201', None, 'TBA')
+    age_tombstones(budget_app)
+    prune(budget_app)
+
+    stale = budget_client.get(f'/api/sync?since={seq}')
+    assert stale.status_code == 410
+    assert stale.get_json()['resync_required'] is True
+
+    # From scratch the client gets the rows that are left, and can go on from there
+    fresh = budget_client.get('/api/sync?since=0').get_json()
+    assert [course['code'] for course in fresh['changes']['courses']] == ['MA201']
+    assert budget_client.get(f"/api/sync?since={fresh['seq']}").status_code == 200
+
+
+def test_pruning_never_brings_back_an_older_cached_answer(budget_app, budget_client):
+    response_cache.version_seconds = 0
+    add_course(budget_client, 'CS101', None, 'TBA')
+    add_course(budget_client, 'MA201', None, 'TBA')
+    # Cached under MA201's number, the newest in the table
+    assert len(budget_client.get('/api/courses/').get_json()) == 2
+    budget_client.delete('/api/courses/1')
+    assert len(budget_client.get('/api/courses/').get_json()) == 1
+
+    # Without its tombstone the table's newest number would be MA201's again
+    age_tombstones(budget_app)
+    prune(budget_app)
+    assert [course['code'] for course in budget_client.get('/api/courses/').get_json()] == ['MA201']
+
+
+def test_the_timetable_forgets_courses_whose_delete_was_pruned(budget_app, budget_client):
+    add_course(budget_client, 'CS101', 'R1', 'M 9:00-10:00')
+    add_course(budget_client, 'MA201', 'R2', 'M 9:00-10:00')
+    # Deleted by another worker: this process only learns of it from the change log
+    with budget_app.app_context():
+        db.session.execute(db.text("DELETE FROM course WHERE code = 'CS101'"))
+        db.session.commit()
+    age_tombstones(budget_app)
+    prune(budget_app)
+
+    assert add_course(budget_client, 'PH110', 'R1', 'M 9:00-10:00').status_code == 201
@@ -0,0 +1,286 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import defaultdict
+from models import db, Course, Tombstone, ChangeSequence
+
+# --- 1. PARSING Course.time INTO WEEKLY INTERVALS ---
+
+# A class meeting is a half-open interval [start, end) in minutes since Monday 00:00,
+# so meetings on different days never overlap and comparing two is just two integer checks.
+MINUTES_PER_DAY = 24 * 60
+
+DAY_LABELS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+DAY_NAMES = {
+    'mon': 0, 'monday': 0,
+    'tue': 1, 'tues': 1, 'tuesday': 1,
+    'wed': 2, 'wednesday': 2,
+    'thu': 3, 'thur': 3, 'thurs': 3, 'thursday': 3,
+    'fri': 4, 'friday': 4,
+    'sat': 5, 'saturday': 5,
+    'sun': 6, 'sunday': 6,
+}
+# Short forms, also run together as in "MWF" or "TTh" (R is Thursday too)
+DAY_LETTERS = {'m': 0, 't': 1, 'tu': 1, 'w': 2, 'th': 3, 'r': 3, 'f': 4, 'sa': 5, 'su': 6}
+DAY_LETTERS_PATTERN = re.compile(r'th|tu|sa|su|m|t|w|r|f')
+
+TIME_PATTERN = re.compile(
+    r'(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?'
+    r'(?:\s*(?:-|–|—|to)\s*(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?)?\s*$'
+)
+
+# Length of a class given only its start time ("M W F 11:00")
+DEFAULT_CLASS_MINUTES = 50
+
+# Values that mean "not scheduled yet"
+UNSCHEDULED = ('', 'tba', 'tbd', 'none')
+
+
+class TimeSlotError(ValueError):
+    # The time slot couldn't be read
+    pass
+
+
+def _parse_days(text):
+    days = set()
+    for token in re.findall(r'[a-z]+', text):
+        if token in DAY_NAMES:
+            days.add(DAY_NAMES[token])
+            continue
+        letters = DAY_LETTERS_PATTERN.findall(token)
+        if ''.join(letters) != token:
+            raise TimeSlotError(f"Unknown day '{token}'")
+        days.update(DAY_LETTERS[letter] for letter in letters)
+    return days
+
+def _minutes(hour, minute, meridiem):
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            raise TimeSlotError('Use hours 1-12 with am/pm')
+        hour = hour % 12 + (12 if meridiem.startswith('p') else 0)
+    if hour > 24 or minute > 59:
+        raise TimeSlotError('Invalid time of day')
+    return hour * 60 + minute
+
+def parse_time_slot(value):
+    # "M W F 11:00", "TTh 2:00-3:15pm", "Mon/Wed 14:00-15:30" -> sorted (start, end) tuples.
+    # Empty or TBA means unscheduled: no intervals. Raises TimeSlotError.
+    if value is not None and not isinstance(value, str):
+        raise TimeSlotError('The time slot must be text')
+    text = (value or '').strip().lower()
+    if text in UNSCHEDULED:
+        return ()
+
+    first_digit = re.search(r'\d', text)
+    if first_digit is None:
+        raise TimeSlotError('Missing the time of day')
+    days = _parse_days(text[:first_digit.start()])
+    if not days:
+        raise TimeSlotError('Missing the days of the week')
+    match = TIME_PATTERN.match(text, first_digit.start())
+    if match is None:
+        raise TimeSlotError('Write the time as HH:MM or HH:MM-HH:MM (optionally with am/pm)')
+
+    start_hour, start_minute, start_meridiem, end_hour, end_minute, end_meridiem = match.groups()
+    if end_hour is None:
+        start = _minutes(start_hour, start_minute, start_meridiem)
+        end = start + DEFAULT_CLASS_MINUTES
+    else:
+        end = _minutes(end_hour, end_minute, end_meridiem)
+        # "2-3:15pm": the start shares the end's am/pm unless that would put it after the end
+        if start_meridiem is None and end_meridiem is not None and int(start_hour) <= 12:
+            start = _minutes(start_hour, start_minute, end_meridiem)
+            if start >= end:
+                start = _minutes(start_hour, start_minute, 'am')
+        else:
+            start = _minutes(start_hour, start_minute, start_meridiem)
+    if not start < end <= MINUTES_PER_DAY:
+        raise TimeSlotError('The class must end after it starts, on the same day')
+
+    return tuple(sorted((day * MINUTES_PER_DAY + start, day * MINUTES_PER_DAY + end) for day in days))
+
+def describe_interval(start, end):
+    day, start = divmod(start, MINUTES_PER_DAY)
+    end -= day * MINUTES_PER_DAY
+    return f'{DAY_LABELS[day]} {start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}'
+
+def resource_keys(room, prof):
+    # Rooms and professors as typed by hand: ignore case and extra spaces
+    keys = []
+    if room and room.strip():
+        keys.append(('room', ' '.join(room.split()).upper()))
+    if prof and prof.strip():
+        keys.append(('professor', ' '.join(prof.split()).casefold()))
+    return keys
+
+
+# --- 2. THE INTERVAL INDEX ---
+
+class TimetableIndex:
+    # Every scheduled meeting, kept per room and per professor as a list sorted by start.
+    # A check bisects into the one or two lists it needs, so its cost depends on that
+    # room's or professor's week, not on the size of the catalog.
+    #
+    # Each server process has its own index. Before a check it catches up on other
+    # processes' writes through the change log (courses with a newer version, course
+    # tombstones), so it reads O(changes) rows, never the whole table after the first load.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen = 0 # Newest change sequence number applied
+        self._courses = {} # course id -> (code, keys, intervals)
+        self._meetings = defaultdict(list) # (kind, key) -> sorted [(start, end, course id)]
+        self._longest = 0 # Longest meeting so far, bounds how far back a search has to look
+
+    def _remove(self, course_id):
+        code, keys, intervals = self._courses.pop(course_id, (None, [], ()))
+        for key in keys:
+            meetings = self._meetings[key]
+            for start, end in intervals:
+                index = bisect.bisect_left(meetings, (start, end, course_id))
+                if index < len(meetings) and meetings[index] == (start, end, course_id):
+                    del meetings[index]
+            if not meetings:
+                del self._meetings[key]
+
+    def _put(self, course_id, code, room, prof, time):
+        self._remove(course_id)
+        try:
+            intervals = parse_time_slot(time)
+        except TimeSlotError:
+            # Older free-form slots can't clash with anything; /api/courses/conflicts lists them
+            intervals = ()
+        keys = resource_keys(room, prof) if intervals else []
+        self._courses[course_id] = (code, keys, intervals)
+        for key in keys:
+            for start, end in intervals:
+                bisect.insort(self._meetings[key], (start, end, course_id))
+                self._longest = max(self._longest, end - start)
+
+    def _catch_up(self, exclude_id=None):
+        # Apply every course change committed since the last call. The row being written
+        # in the current transaction (exclude_id) is left out until it is committed.
+        deleted = db.session.query(Tombstone.seq, Tombstone.row_id) \
+            .filter(Tombstone.user_id.is_(None), Tombstone.seq > self._seen, Tombstone.table_name == 'course')
+        if self._seen:
+            # Plus a (pruned_seq, None) row when deletes after _seen were pruned (same statement)
+            deleted = deleted.union_all(db.session.query(ChangeSequence.pruned_seq, db.null())
+                                        .filter(ChangeSequence.id == 1, ChangeSequence.pruned_seq > self._seen))
+        deleted = deleted.all()
+        if any(row_id is None for _, row_id in deleted):
+            # This process may still hold a course deleted meanwhile: load the catalog again
+            # (the rows alone are then complete, so no more statements than a normal catch-up)
+            self._courses.clear()
+            self._meetings.clear()
+            self._seen = 0
+            deleted = []
+
+        changed = db.session.query(Course.version, Course.id, Course.code, Course.room, Course.prof, Course.time) \
+            .filter(Course.version > self._seen)
+        if exclude_id is not None:
+            changed = changed.filter(Course.id != exclude_id)
+        for change in sorted([(row[0], tuple(row[1:])) for row in changed] + [(seq, row_id) for seq, row_id in deleted]):
+            seq, course = change
+            if isinstance(course, tuple):
+                self._put(*course)
+            else:
+                self._remove(course)
+            self._seen = max(self._seen, seq)
+
+    def _clashes(self, course_id, keys, intervals):
+        clashes = []
+        for key in keys:
+            meetings = self._meetings.get(key, [])
+            for start, end in intervals:
+                # Only meetings starting in (start - longest, end) can overlap [start, end)
+                index = bisect.bisect_right(meetings, (start - self._longest, float('inf'), 0))
+                while index < len(meetings) and meetings[index][0] < end:
+                    other_start, other_end, other_id = meetings[index]
+                    if other_end > start and other_id != course_id:
+                        clashes.append({
+                            'kind': key[0],
+                            'with': self._courses[other_id][0],
+                            'course_id': other_id,
+                            'when': describe_interval(max(start, other_start), min(end, other_end))
+                        })
+                    index += 1
+        return clashes
+
+    def check(self, course_id, room, prof, intervals):
+        # Meetings of other courses that share the room or professor at an overlapping time.
+        # Call it after flushing the course: the write lock then stops any other process from
+        # committing a clashing course before this transaction does.
+        with self._lock:
+            self._catch_up(exclude_id=course_id)
+            return self._clashes(course_id, resource_keys(room, prof), intervals)
+
+    def put(self, course_id, code, room, prof, time):
+        # Record a committed course (the next catch-up would find it too)
+        with self._lock:
+            self._put(course_id, code, room, prof, time)
+
+    def remove(self, course_id):
+        with self._lock:
+            self._remove(course_id)
+
+    def clear(self):
+        # Forget every course, e.g. when the app is pointed at another database
+        with self._lock:
+            self._seen = 0
+            self._courses.clear()
+            self._meetings.clear()
+            self._longest = 0
+
+
+# The index the course routes use
+timetable_index = TimetableIndex()
+
+
+# --- 3. CHECKING THE WHOLE CATALOG ---
+
+def find_conflicts(courses):
+    # courses: (id, code, room, prof, time) rows. Sweeps each room's and professor's
+    # meetings in start order, keeping the ones still running in a heap, so the cost is
+    # O(n log n + clashes) for n meetings.
+    by_key = defaultdict(list)
+    codes = {}
+    unparsed = []
+    unscheduled = 0
+    for course_id, code, room, prof, time in courses:
+        codes[course_id] = code
+        try:
+            intervals = parse_time_slot(time)
+        except TimeSlotError as error:
+            unparsed.append({'course_id': course_id, 'code': code, 'time_slot': time, 'message': str(error)})
+            continue
+        if not intervals:
+            unscheduled += 1
+        for key in resource_keys(room, prof):
+            by_key[key].extend((start, end, course_id) for start, end in intervals)
+
+    # (kind, key, first course, second course) -> overlapping meetings
+    clashes = defaultdict(list)
+    for key, meetings in by_key.items():
+        meetings.sort()
+        running = [] # heap of (end, start, course id)
+        for start, end, course_id in meetings:
+            while running and running[0][0] <= start:
+                heapq.heappop(running)
+            for other_end, other_start, other_id in running:
+                first, second = sorted((course_id, other_id))
+                clashes[(key[0], key[1], first, second)].append(describe_interval(start, min(end, other_end)))
+            heapq.heappush(running, (end, start, course_id))
+
+    return {
+        'courses': len(codes),
+        'unscheduled': unscheduled,
+        'unparsed': unparsed,
+        'conflicts': [{
+            'kind': kind,
+            'resource': key,
+            'courses': [codes[first], codes[second]],
+            'course_ids': [first, second],
+            'when': when
+        } for (kind, key, first, second), when in sorted(clashes.items())]
+    }
@@ -0,0 +1,152 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from models import db, RevokedToken
+
+# --- 1. SMALL LRU STORE ---
+
+# Keeps up to max_entries keys (None = no limit), each with the time it stops being useful
+class ExpiringLRU:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def prune(self):
+        # Drop the expired entries
+        now = time.time()
+        with self._lock:
+            for key in [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Tokens we already checked the signature of, and tokens that were logged out.
+# Revocations are never evicted early (that would make a logged-out token work again);
+# they leave once the token has expired anyway.
+verified_tokens = ExpiringLRU(max_entries=4096)
+revoked_tokens = ExpiringLRU(max_entries=None)
+
+# The role that may read and change every student's data
+ADMIN_ROLE = 'Admin'
+
+
+# --- 2. ISSUING AND CHECKING TOKENS ---
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='campus-auth')
+
+def issue_token(user):
+    # The token carries everything the routes need, so checking it never touches the database
+    payload = {'uid': user.id, 'role': user.role, 'jti': uuid.uuid4().hex}
+    return _serializer().dumps(payload)
+
+def verify_token(token):
+    # Returns the token's payload, or None if it is invalid, expired or revoked
+    payload = verified_tokens.get(token)
+    if payload is None:
+        max_age = current_app.config['TOKEN_MAX_AGE']
+        try:
+            payload, signed_at = _serializer().loads(token, max_age=max_age, return_timestamp=True)
+        except (SignatureExpired, BadSignature):
+            return None
+        payload['exp'] = signed_at.timestamp() + max_age
+        verified_tokens.put(token, payload, payload['exp'])
+
+    if revoked_tokens.get(payload['jti']):
+        return None
+    return payload
+
+def revoke_token(payload):
+    # Remember the token id until the token would have expired anyway. The row tells the
+    # other server processes; they pick it up within TOKEN_REVOCATION_REFRESH_SECONDS.
+    revoked_tokens.put(payload['jti'], True, payload['exp'])
+    db.session.execute(db.delete(RevokedToken).where(RevokedToken.expires_at <= time.time()))
+    db.session.add(RevokedToken(jti=payload['jti'], expires_at=payload['exp']))
+    db.session.commit()
+
+
+# Newest revocation row this process has loaded, and when it last looked
+_revocations = {'last_id': 0, 'checked_at': 0.0}
+_revocations_lock = threading.Lock()
+
+def load_revocations():
+    # Pick up tokens logged out in other processes: at most one small indexed read
+    # every TOKEN_REVOCATION_REFRESH_SECONDS, not one per request
+    now = time.time()
+    if now - _revocations['checked_at'] < current_app.config['TOKEN_REVOCATION_REFRESH_SECONDS']:
+        return
+    with _revocations_lock:
+        if now - _revocations['checked_at'] < current_app.config['TOKEN_REVOCATION_REFRESH_SECONDS']:
+            return
+        rows = db.session.query(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at) \
+            .filter(RevokedToken.id > _revocations['last_id']) \
+            .order_by(RevokedToken.id) \
+            .all()
+        for row_id, jti, expires_at in rows:
+            revoked_tokens.put(jti, True, expires_at)
+            _revocations['last_id'] = row_id
+        revoked_tokens.prune()
+        _revocations['checked_at'] = now
+
+def get_bearer_token():
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return header[len('Bearer '):].strip()
+    return None
+
+
+# --- 3. DECORATOR FOR ROUTES ---
+
+def token_required(view):
+    # Puts the caller's {'uid', 'role', ...} in g.current_user, and stops students from
+    # using a route's <user_id> that isn't their own (admins may use any).
+    # When AUTH_REQUIRED is off, requests without a token are still let through.
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = get_bearer_token()
+        if token:
+            load_revocations()
+        g.current_user = verify_token(token) if token else None
+
+        if g.current_user is None and (token or current_app.config.get('AUTH_REQUIRED')):
+            return jsonify({'message': 'Missing, invalid or expired token'}), 401
+        if 'user_id' in kwargs and not can_act_for(kwargs['user_id']):
+            return forbidden()
+        return view(*args, **kwargs)
+    return wrapper
+
+def can_act_for(user_id):
+    # True if the caller may read or change this student's data.
+    # Without a token (AUTH_REQUIRED off) there is nobody to check against.
+    user = g.get('current_user')
+    return user is None or user.get('role') == ADMIN_ROLE or user['uid'] == user_id
+
+def forbidden():
+    # 403 means 'Forbidden': a valid token, but not for this student's data
+    return jsonify({'message': "You can only access your own data"}), 403
@@ -0,0 +1,5 @@
+# Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+# The schema is created separately (flask --app app init-db), so loading this is cheap.
+from app import create_app
+
+app = create_app()